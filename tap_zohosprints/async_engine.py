@@ -0,0 +1,289 @@
+"""Opt in asyncio engine, crawling each project's subtree ahead of the sync."""
+
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+
+from tap_zohosprints.cache import CachedResponse
+from tap_zohosprints.client import APILockoutError, uncounted_mapper_lookups
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, see the async extra
+    httpx = None
+
+
+class AsyncRateLimiter:
+    """Awaitable front for the tap's rate limiter.
+
+    Slots are reserved from the same RateLimiter (or SharedRateLimiter) the
+    blocking requests use, so together they stay inside the API budget.
+    """
+
+    def __init__(self, tap: Any):
+        self._tap = tap
+
+    async def acquire(self) -> float:
+        """Wait until a request may be sent, return the seconds waited."""
+        delay = self._tap.rate_limiter.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class AsyncRequestEngine:
+    """Sends the requests below a record concurrently, from one event loop.
+
+    The sync itself is unchanged. Before a subtree is synced the engine
+    walks it: each stream's pages are requested with httpx, parsed with the
+    stream's own parse_response and turned into child contexts with its
+    get_child_context, the same way the sync will. The responses are held
+    until the sync prepares a request for the same URL (see
+    ZohoSprintsStream._request), so the Singer output is the same as without
+    the engine. A request the engine didn't predict, or failed to send, is
+    simply sent by the sync as usual.
+
+    The responses are handed over with their decoded bodies, the sync
+    doesn't decode them again. At most max_buffered_responses are held
+    (give or take the requests in flight), past that the crawl stops and the
+    sync sends the rest of the subtree's requests itself.
+    """
+
+    # httpx transport to send the requests through, None for the network
+    transport: Any = None
+
+    def __init__(
+        self,
+        tap: Any,
+        concurrency: int = 10,
+        timeout: float = 300,
+        max_buffered_responses: int = 500,
+    ):
+        self._tap = tap
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout = timeout
+        self.max_buffered_responses = max(int(max_buffered_responses), 1)
+        self.limiter = AsyncRateLimiter(tap)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Any = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Responses waiting for the sync, by URL
+        self._responses: Dict[str, requests.Response] = {}
+        # Deduplicated records requested during this crawl
+        self._claimed: Set[Any] = set()
+        self._stopped = False
+        # crawls, requests, prefetched, served, unused, errors, throttled,
+        # lockouts, buffer_full, most_buffered, crawl_seconds
+        self.stats: Counter = Counter()
+
+    @staticmethod
+    def available() -> bool:
+        """True when httpx is installed."""
+        return httpx is not None
+
+    def crawl(self, stream: Any, child_context: dict, record: Optional[dict]) -> None:
+        """Prefetch the responses of the streams below one of stream's records."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        self._stopped = False
+        self._claimed = set()
+        start = time.perf_counter()
+        self._loop.run_until_complete(
+            self._crawl_children(stream, child_context, record)
+        )
+        self.stats["crawls"] += 1
+        self.stats["crawl_seconds"] += time.perf_counter() - start
+
+    def pop(self, url: str) -> Optional[requests.Response]:
+        """Hand over the prefetched response for a URL, if there is one."""
+        response = self._responses.pop(url, None)
+        if response is not None:
+            self.stats["served"] += 1
+        return response
+
+    def clear(self) -> None:
+        """Drop the responses the sync didn't ask for."""
+        self.stats["unused"] += len(self._responses)
+        self._responses.clear()
+
+    def close(self) -> None:
+        """Close the connections and the event loop."""
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.aclose())
+            self._client = None
+        self._loop.close()
+        self._loop = None
+
+    async def _crawl_children(
+        self, stream: Any, child_context: dict, record: Optional[dict]
+    ) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(
+                self._crawl(child_stream, child_context, record)
+                for child_stream in stream.child_streams
+                if child_stream.selected or child_stream.has_selected_descendents
+            )
+        )
+
+    async def _crawl(
+        self, stream: Any, context: dict, parent_record: Optional[dict]
+    ) -> None:
+        """Fetch the stream's records for context, then walk their children."""
+        rows = self._synthesized_rows(stream, context, parent_record)
+        if rows is None:
+            if stream.deduplicate_by and not self._claim(
+                stream, context, parent_record
+            ):
+                return
+            rows = await self._fetch_pages(stream, context)
+        children = [
+            child_stream
+            for child_stream in stream.child_streams
+            if child_stream.selected or child_stream.has_selected_descendents
+        ]
+        if not children:
+            return
+        crawls = []
+        for row in rows:
+            record = stream.predict_record(row, context)
+            if record is None:
+                continue
+            child_context = stream.get_child_context(record=record, context=context)
+            if not stream.walks_children(child_context, record):
+                continue
+            crawls.extend(
+                self._crawl(child_stream, child_context, record)
+                for child_stream in children
+            )
+        await asyncio.gather(*crawls)
+
+    @staticmethod
+    def _synthesized_rows(
+        stream: Any, context: dict, parent_record: Optional[dict]
+    ) -> Optional[List[dict]]:
+        """The records the sync will build without a request, if it will."""
+        if not stream.synthesizes_records or parent_record is None:
+            return None
+        required = stream.required_record_properties(context)
+        if required is None or not required <= set(parent_record.get("record", {})):
+            return None
+        return [parent_record]
+
+    def _claim(self, stream: Any, context: dict, parent_record: Optional[dict]) -> bool:
+        """Return False when the sync won't request the record, see claim_context."""
+        modified_time = None
+        if parent_record is not None and stream.parent_stream_type:
+            modified_time = parent_record.get(stream.parent_stream_type.replication_key)
+        seen_key = (context.get(stream.deduplicate_by), modified_time)
+        if seen_key in self._tap.seen_items or seen_key in self._claimed:
+            return False
+        self._claimed.add(seen_key)
+        return True
+
+    async def _fetch_pages(self, stream: Any, context: dict) -> List[dict]:
+        rows: List[dict] = []
+        next_page_token = stream.resumed_page_token(context)
+        while not self._stopped:
+            prepared_request = stream.prepare_request(context, next_page_token)
+            response = await self._fetch(stream, prepared_request)
+            if response is None:
+                break
+            try:
+                # The sync maps the same records again, and counts that
+                with uncounted_mapper_lookups():
+                    rows.extend(stream.parse_response(response))
+            except Exception:
+                # The sync gets the same response and reports it
+                self.stats["errors"] += 1
+                break
+            previous_token = next_page_token
+            next_page_token = stream.get_next_page_token(response, previous_token)
+            if not next_page_token or next_page_token == previous_token:
+                break
+        return rows
+
+    async def _fetch(
+        self, stream: Any, prepared_request: requests.PreparedRequest
+    ) -> Optional[requests.Response]:
+        """Send a request, keep the response for the sync if it's good."""
+        url = prepared_request.url
+        if stream.response_cache_ttl:
+            cache = self._tap.response_cache
+            cached_response = cache.get(cache.key_for(prepared_request))
+            if (
+                cached_response is not None
+                and cached_response.age() < stream.response_cache_ttl
+            ):
+                # The sync reads it from the cache too
+                return cached_response.to_response(prepared_request)
+        async with self._semaphore:
+            if self._stopped or not self._tap.circuit_breaker.is_closed():
+                self._stopped = True
+                return None
+            if len(self._responses) >= self.max_buffered_responses:
+                # Left to the sync, rather than holding any more in memory
+                self.stats["buffer_full"] += 1
+                self._stopped = True
+                return None
+            throttled_seconds = await self.limiter.acquire()
+            stream.increment_run_stat("throttled_seconds", throttled_seconds)
+            stream.increment_run_stat("requests_sent")
+            stream.increment_metric("throttled_seconds", throttled_seconds)
+            stream.increment_metric("requests")
+            self.stats["requests"] += 1
+            start = time.perf_counter()
+            try:
+                http_response = await self._client.request(
+                    prepared_request.method,
+                    url,
+                    headers=dict(prepared_request.headers),
+                    content=prepared_request.body,
+                )
+            except httpx.HTTPError as error:
+                self.stats["errors"] += 1
+                stream.logger.debug(f"Async request to {url} failed: {error}")
+                return None
+            finally:
+                stream.observe_metric("request_seconds", time.perf_counter() - start)
+        if http_response.status_code == 429:
+            self._tap.rate_limiter.throttled()
+            self.stats["throttled"] += 1
+            return None
+        prefetched = CachedResponse(
+            url, dict(http_response.headers), http_response.content, time.time()
+        )
+        response = prefetched.to_response(prepared_request)
+        response.status_code = http_response.status_code
+        try:
+            stream.validate_response(response)
+        except APILockoutError:
+            # Left to the sync, which waits the lockout out
+            self.stats["lockouts"] += 1
+            self._stopped = True
+            return None
+        except Exception:
+            self.stats["errors"] += 1
+            return None
+        if http_response.status_code != 200:
+            return None
+        self._tap.rate_limiter.succeeded()
+        stream.observe_metric("response_bytes", len(http_response.content))
+        # validate_response left the decoded body on it for the sync
+        self._responses[url] = response
+        self.stats["prefetched"] += 1
+        self.stats["most_buffered"] = max(
+            self.stats["most_buffered"], len(self._responses)
+        )
+        return response
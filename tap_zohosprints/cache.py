@@ -0,0 +1,160 @@
+"""Persistent on disk cache of API responses."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, NamedTuple, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth keeping, the rest are per request noise
+_CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def credentials_namespace(*credentials: str) -> str:
+    """Return a cache namespace identifying the account behind credentials."""
+    return hashlib.sha256("\n".join(credentials).encode()).hexdigest()[:16]
+
+
+class CachedResponse(NamedTuple):
+    """A response body as it was stored in the cache."""
+
+    key: str
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+
+    def age(self) -> float:
+        """Seconds since the response was fetched or last revalidated."""
+        return time.time() - self.stored_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers asking the API to only send the body if it changed."""
+        headers = {}
+        if self.headers.get("ETag"):
+            headers["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self, request: requests.PreparedRequest) -> requests.Response:
+        """Rebuild a requests.Response the streams can parse as usual."""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+
+class ResponseCache:
+    """SQLite backed response cache with least recently used eviction.
+
+    Entries are keyed by the namespace, the HTTP method and the fully
+    rendered URL (including query params). URLs like /teams/ are the same
+    for every account, the namespace keeps taps with different credentials
+    sharing a cache file out of each other's responses. Freshness is
+    decided by the caller, which knows the TTL for its stream, the cache
+    only keeps track of when each entry was stored and last read.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = 256 * 1024 * 1024, namespace: str = ""
+    ):
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+            " ON responses (accessed_at)"
+        )
+        (total_bytes,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self._total_bytes = total_bytes
+        # misses, stored, revalidated, evicted
+        self.stats: Counter = Counter()
+
+    def key_for(self, request: requests.PreparedRequest) -> str:
+        """Return the cache key of a request."""
+        return f"{self.namespace} {request.method} {request.url}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for key, if there is one."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT headers, body, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        headers, body, stored_at = row
+        return CachedResponse(key, json.loads(headers), bytes(body), stored_at)
+
+    def put(self, key: str, response: requests.Response) -> None:
+        """Store a successful response, evicting old entries if needed."""
+        headers = {
+            name: response.headers[name]
+            for name in _CACHED_HEADERS
+            if name in response.headers
+        }
+        body = response.content
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if previous:
+                self._total_bytes -= previous[0]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(headers), body, len(body), now, now),
+            )
+            self._total_bytes += len(body)
+            self.stats["stored"] += 1
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        """Mark an entry fresh again after the API said it hasn't changed."""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self.stats["revalidated"] += 1
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            row = self._connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+            self.stats["evicted"] += 1
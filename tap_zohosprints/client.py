@@ -2,12 +2,37 @@
 
 import backoff
 import copy
+import json
+from functools import partial
 import requests
+import shutil
+import tempfile
+import threading
 import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional, Union, List, Iterable, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    NamedTuple,
+    Optional,
+    Union,
+    List,
+    Iterable,
+    Iterator,
+    Set,
+    Tuple,
+    cast,
+)
 
+import singer
 from memoization import cached
+from singer import StateMessage
 
 from singer_sdk.helpers.jsonpath import extract_jsonpath
 from singer_sdk.authenticators import (
@@ -20,8 +45,75 @@ from singer_sdk.authenticators import (
 from singer_sdk.exceptions import FatalAPIError, RetriableAPIError
 from singer_sdk.streams import RESTStream
 
+from tap_zohosprints.scheduler import (
+    SiblingTask,
+    defers_state_messages,
+    run_in_order,
+)
+from tap_zohosprints.session import connection_owner, streamed_responses
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup, see the fast-json extra
+    orjson = None
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # ijson is optional, see the streaming extra
+    ijson = None
+
 SCHEMAS_DIR = Path(__file__).parent / Path("./schemas")
 
+_DECODED_BODY_ATTRIBUTE = "_zohosprints_decoded_body"
+# Set on responses whose body was left unread for _stream_unfurl
+_STREAMED_BODY_ATTRIBUTE = "_zohosprints_streamed_body"
+# Streamed bodies are spooled to a temporary file past this size
+_SPOOL_MAX_BYTES = 1024 * 1024
+# Size of a streamed body, which isn't kept in response.content
+_BODY_BYTES_ATTRIBUTE = "_zohosprints_body_bytes"
+# Streamed bodies up to this size are read whole and validated like any
+# other, Zoho's error bodies (lockouts included) are far smaller than a page
+_PEEK_MAX_BYTES = 4 * 1024
+# Set on streamed responses to the leading bytes read by _peek_streamed_body
+_PEEKED_BYTES_ATTRIBUTE = "_zohosprints_peeked_bytes"
+# Zoho's error code for a client locked out of the API for a while
+LOCKOUT_CODE = 7602.1
+
+
+class APILockoutError(FatalAPIError):
+    """Locked out of the API, fatal once the circuit breaker gives up."""
+
+
+class APIThrottledError(RetriableAPIError):
+    """The API asked us to slow down (HTTP 429)."""
+
+
+def decode_response(response: requests.Response) -> Any:
+    """Return the decoded JSON body of a response, decoding it at most once.
+
+    validate_response, get_next_page_token and parse_response all need the
+    body, so the decoded object is stashed on the response and shared. Uses
+    orjson when it's installed, falls back to the stdlib otherwise.
+    """
+    decoded = getattr(response, _DECODED_BODY_ATTRIBUTE, None)
+    if decoded is None:
+        if orjson is not None:
+            decoded = orjson.loads(response.content)
+        else:
+            decoded = json.loads(response.content)
+        setattr(response, _DECODED_BODY_ATTRIBUTE, decoded)
+    return decoded
+
+
+class Projection(NamedTuple):
+    """Unselected parts of the unfurled records, never built."""
+
+    # Properties left out of "record"
+    record_properties: FrozenSet[str]
+    # Envelope keys left out of the record
+    keys: FrozenSet[str]
+
 
 class ZohoSprintsAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
     @property
@@ -48,6 +140,808 @@ class ZohoSprintsStream(RESTStream):
 
     _LOG_REQUEST_METRIC_URLS: bool = True
 
+    # Set on streams whose contexts don't depend on each other (one request
+    # per parent record), the parent can then fetch them concurrently
+    concurrent_contexts: bool = False
+    # Seconds responses stay fresh in the opt in response cache, None to
+    # never cache. Overridable per stream with the response_cache_ttls setting
+    cache_ttl: Optional[float] = None
+    # Name of a boolean setting that lets this stream build its records from
+    # the parent's list record when the list has every property we'd sync
+    synthesize_setting: Optional[str] = None
+    # Context keys that decide which properties the endpoint returns, custom
+    # fields are configured per project
+    synthesize_scope_keys: List[str] = ["projectId"]
+    # Record key shared with other streams reaching the same records through
+    # a different parent. Each key (and parent modified time) is only
+    # requested and emitted once per run, see TapZohoSprints.seen_items
+    deduplicate_by: Optional[str] = None
+    # Throttled responses retried by _send before leaving it to the SDK
+    max_throttled_retries: int = 8
+    # Record in the state which child contexts had their whole subtree
+    # synced, a restarted run skips them. Cleared once a sync finishes
+    checkpoint_subtrees: bool = False
+    # Record in the state the page reached in each context, a restarted run
+    # resumes from it. Cleared once the context is done
+    checkpoint_pages: bool = False
+    # Parse response bodies as they stream in, record by record, instead of
+    # decoding whole pages, when the stream_json_pages setting is on. Needs
+    # ijson, see ZohoSprintsPropsStream.unfurl
+    stream_json_pages: bool = False
+    # Record properties the tap reads itself, never left out by projection
+    kept_record_properties: List[str] = []
+    # Have the async engine crawl the subtree below each record before it's
+    # synced, see TapZohoSprints.async_engine
+    async_subtrees: bool = False
+    # Sync the child streams of each record concurrently, up to the
+    # sibling_concurrency setting, see _sync_child_streams
+    concurrent_children: bool = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Counters for this run, logged by the tap once the sync is done
+        self.run_stats: Counter = Counter()
+        self._run_stats_lock = threading.Lock()
+        # Records fetched ahead of time, keyed by context_key()
+        self._prefetched_records: Dict[str, List[dict]] = {}
+        self._pending_child_contexts: List[dict] = []
+        # The parents' record writes and bookmark updates held back after each
+        # batched context, done once its children are synced. See
+        # _flush_child_contexts
+        self._held_parent_writes: List[List[Callable[[], None]]] = []
+        self._current_record: Optional[dict] = None
+        # Parent list records to synthesize from, keyed by context_key()
+        self._parent_records: Dict[str, dict] = {}
+        # Parent replication key values to deduplicate on, keyed by context_key()
+        self._parent_modified_times: Dict[str, Any] = {}
+        # Properties the endpoint returned, keyed by synthesize_scope_keys
+        self._endpoint_properties: Dict[str, Set[str]] = {}
+        # context_key() of every completed subtree in the checkpoints
+        self._completed_subtrees: Optional[Set[str]] = None
+        # Records parsed from the page last requested
+        self._page_records = 0
+        # Compiled _prop mappings for property_unfurler
+        self.record_mappers = RecordMappers()
+        self._projection: Optional[Projection] = None
+        self._projection_built = False
+
+    def increment_run_stat(self, key: str, amount: Union[int, float] = 1) -> None:
+        """Thread safe increment of one of the run_stats counters."""
+        with self._run_stats_lock:
+            self.run_stats[key] += amount
+
+    def increment_metric(self, name: str, amount: Union[int, float] = 1) -> None:
+        """Add to a counter of this stream's endpoint, see TapZohoSprints.metrics."""
+        self._tap.metrics.increment(self.name, self.path, name, amount)
+
+    def observe_metric(self, name: str, value: float) -> None:
+        """Add a value to a histogram of this stream's endpoint."""
+        self._tap.metrics.observe(self.name, self.path, name, value)
+
+    def response_json(self, response: requests.Response) -> Any:
+        """Return the decoded body of the response, timing the decode."""
+        decoded = getattr(response, _DECODED_BODY_ATTRIBUTE, None)
+        if decoded is None:
+            start = time.perf_counter()
+            decoded = decode_response(response)
+            self.increment_run_stat("decoded_responses")
+            decode_seconds = time.perf_counter() - start
+            self.increment_run_stat("decode_seconds", decode_seconds)
+            self.increment_metric("decode_seconds", decode_seconds)
+        return decoded
+
+    @staticmethod
+    def context_key(context: Optional[dict]) -> str:
+        """Return a stable key for a context dictionary."""
+        return json.dumps(context or {}, sort_keys=True)
+
+    @property
+    def detail_concurrency(self) -> int:
+        """Number of threads used to fetch concurrent_contexts children."""
+        return max(int(self.config.get("detail_concurrency", 1)), 1)
+
+    @property
+    def streams_json_pages(self) -> bool:
+        """True when response bodies are left unread for a streaming parse.
+
+        Only with the stream_json_pages setting on, and not for cached
+        streams, the cache stores whole bodies.
+        """
+        return bool(
+            self.stream_json_pages
+            and self.config.get("stream_json_pages")
+            and ijson is not None
+            and not self.response_cache_ttl
+        )
+
+    @property
+    def fans_out_children(self) -> bool:
+        """True when child contexts are batched and fetched concurrently."""
+        return self.detail_concurrency > 1 and any(
+            child_stream.concurrent_contexts for child_stream in self.child_streams
+        )
+
+    def is_property_selected(self, *breadcrumb: str) -> bool:
+        """Return True if the catalog selects the property at breadcrumb."""
+        return self.mask[breadcrumb]
+
+    @property
+    def projection(self) -> Optional[Projection]:
+        """Unselected parts of the records property_unfurler can skip.
+
+        Never the primary keys, replication key, modified time properties or
+        kept_record_properties, which the tap itself needs. None when nothing
+        can be skipped, or when this stream's records are synthesized into,
+        or synthesized from, since that compares whole records.
+        """
+        if not self._projection_built:
+            self._projection = self._build_projection()
+            self._projection_built = True
+        return self._projection
+
+    def _build_projection(self) -> Optional[Projection]:
+        if not self.config.get("project_selected_properties", True):
+            return None
+        if self.synthesizes_records or any(
+            child_stream.synthesizes_records for child_stream in self.child_streams
+        ):
+            return None
+        properties = self.schema.get("properties", {})
+        kept_keys = {"record", self.replication_key, *(self.primary_keys or [])}
+        kept_properties = set(
+            self.config.get(
+                "modified_time_properties",
+                getattr(self, "modified_time_properties", None),
+            )
+            or []
+        )
+        kept_properties.update(self.kept_record_properties)
+        projection = Projection(
+            record_properties=frozenset(
+                property_name
+                for property_name in properties.get("record", {}).get("properties", {})
+                if property_name not in kept_properties
+                and not self.is_property_selected(
+                    "properties", "record", "properties", property_name
+                )
+            ),
+            keys=frozenset(
+                key
+                for key in properties
+                if key not in kept_keys
+                and not self.is_property_selected("properties", key)
+            ),
+        )
+        if not projection.record_properties and not projection.keys:
+            return None
+        return projection
+
+    @property
+    def synthesizes_records(self) -> bool:
+        """True when records may be built from the parent's list record."""
+        return bool(
+            self.synthesize_setting and self.config.get(self.synthesize_setting)
+        )
+
+    @property
+    def accepts_parent_records(self) -> bool:
+        """True when the parent should hand us each of its records."""
+        return bool(self.synthesizes_records or self.deduplicate_by) and bool(
+            self.selected or self.has_selected_descendents
+        )
+
+    def accept_parent_record(self, context: dict, record: dict) -> None:
+        """Keep what we need from the parent's list record for later."""
+        key = self.context_key(context)
+        parent_replication_key = None
+        if self.parent_stream_type:
+            parent_replication_key = self.parent_stream_type.replication_key
+        if self.deduplicate_by:
+            self._parent_modified_times[key] = record.get(parent_replication_key)
+        if self.synthesizes_records:
+            synthesized = dict(record)
+            synthesized.pop(parent_replication_key, None)
+            self._parent_records[key] = synthesized
+
+    def claim_context(self, context: Optional[dict]) -> bool:
+        """Return False if another stream already synced this record this run."""
+        modified_time = self._parent_modified_times.pop(self.context_key(context), None)
+        seen_key = ((context or {}).get(self.deduplicate_by), modified_time)
+        if self._tap.seen_items.add(seen_key):
+            self.increment_run_stat("deduplicate_claimed")
+            return True
+        self.increment_run_stat("deduplicate_skipped")
+        return False
+
+    def _synthesize_scope(self, context: Optional[dict]) -> str:
+        return self.context_key(
+            {key: (context or {}).get(key) for key in self.synthesize_scope_keys}
+        )
+
+    def required_record_properties(self, context: Optional[dict]) -> Optional[Set]:
+        """Return the selected record properties this endpoint would return.
+
+        None until a real request in the same scope has shown us which
+        properties (including custom fields) the endpoint returns. The _prop
+        lists every property whatever its value, so schema properties missing
+        from it are never returned and aren't required either.
+        """
+        returned = self._endpoint_properties.get(self._synthesize_scope(context))
+        if returned is None:
+            return None
+        return {
+            property_name
+            for property_name in returned
+            if self.is_property_selected(
+                "properties", "record", "properties", property_name
+            )
+        }
+
+    def synthesize_record(self, context: Optional[dict]) -> Optional[dict]:
+        """Build the record from the parent's list record, if it has it all."""
+        parent_record = self._parent_records.pop(self.context_key(context), None)
+        if parent_record is None:
+            return None
+        required = self.required_record_properties(context)
+        if required is None or not required <= set(parent_record["record"]):
+            return None
+        return parent_record
+
+    def request_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Serve prefetched or synthesized records, otherwise hit the API."""
+        prefetched = self._prefetched_records.pop(self.context_key(context), None)
+        if prefetched is not None:
+            yield from prefetched
+            return
+        if self.deduplicate_by and not self.claim_context(context):
+            self._parent_records.pop(self.context_key(context), None)
+            return
+        if self.synthesizes_records:
+            synthesized = self.synthesize_record(context)
+            if synthesized is not None:
+                self.increment_run_stat("requests_avoided")
+                yield synthesized
+                return
+        if self.prefetches_pages:
+            rows = self._request_pages_ahead(context)
+        else:
+            rows = self._request_pages(context)
+        for row in rows:
+            self.increment_run_stat("records_received")
+            self.increment_metric("records")
+            if self.synthesizes_records and "record" in row:
+                self._endpoint_properties.setdefault(
+                    self._synthesize_scope(context), set()
+                ).update(row["record"])
+            yield row
+
+    @property
+    def prefetches_pages(self) -> bool:
+        """True when each page is requested while the one before is emitted."""
+        return bool(self.config.get("prefetch_next_page"))
+
+    def _request_page(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> requests.Response:
+        prepared_request = self.prepare_request(context, next_page_token)
+        return self.request_decorator(self._request)(prepared_request, context)
+
+    def _next_page_token(
+        self, response: requests.Response, previous_token: Optional[Any]
+    ) -> Optional[Any]:
+        next_page_token = self.get_next_page_token(response, previous_token)
+        if next_page_token and next_page_token == previous_token:
+            raise RuntimeError(
+                f"Loop detected in pagination. Pagination token {next_page_token} "
+                "is identical to prior token."
+            )
+        return next_page_token or None
+
+    def _request_pages(self, context: Optional[dict]) -> Iterable[dict]:
+        """The SDK's pagination loop, with page checkpoints."""
+        next_page_token = None
+        while True:
+            if self.checkpoint_pages:
+                next_page_token = self.checkpoint_page(context, next_page_token)
+            response = self._request_page(context, next_page_token)
+            self._page_records = 0
+            for row in self.parse_response(response):
+                self._page_records += 1
+                yield row
+            self.observe_metric("page_records", self._page_records)
+            next_page_token = self._next_page_token(
+                response, copy.deepcopy(next_page_token)
+            )
+            if next_page_token is None:
+                return
+
+    def _fetch_page(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> Tuple[List[dict], Optional[Any]]:
+        """Request and parse a whole page, return its rows and the next token."""
+        response = self._request_page(context, next_page_token)
+        rows = list(self.parse_response(response))
+        self._page_records = len(rows)
+        self.observe_metric("page_records", self._page_records)
+        return rows, self._next_page_token(response, copy.deepcopy(next_page_token))
+
+    def _request_pages_ahead(self, context: Optional[dict]) -> Iterable[dict]:
+        """_request_pages, requesting the next page while this one is emitted.
+
+        Pages are parsed whole, so up to two are held in memory. The request
+        ahead goes through the same rate limiter as every other. It's
+        cancelled, or waited for when already sent, when the rows stop being
+        consumed or an error is raised.
+        """
+        next_page_token = None
+        if self.checkpoint_pages:
+            next_page_token = self.checkpoint_page(context, None)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future: Optional[Future] = executor.submit(
+                self._fetch_page, context, next_page_token
+            )
+            try:
+                first_page = True
+                while future is not None:
+                    page_token = next_page_token
+                    start = time.perf_counter()
+                    rows, next_page_token = future.result()
+                    self.increment_run_stat(
+                        "prefetch_wait_seconds", time.perf_counter() - start
+                    )
+                    future = None
+                    if next_page_token is not None:
+                        future = executor.submit(
+                            self._fetch_page, context, next_page_token
+                        )
+                        self.increment_run_stat("pages_prefetched")
+                    if self.checkpoint_pages and not first_page:
+                        self.checkpoint_page(context, page_token)
+                    first_page = False
+                    yield from rows
+            finally:
+                if future is not None:
+                    future.cancel()
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return a generator of row-type dictionary objects."""
+        for record in super().get_records(context):
+            # The SDK only adds the keys of the state partition, which can be
+            # coarser than the context (see state_partitioning_keys)
+            for key, value in (context or {}).items():
+                record.setdefault(key, value)
+            # The SDK syncs children before asking for the next record
+            self._current_record = record
+            yield record
+        self._current_record = None
+        # Before the SDK finalizes the bookmarks and writes the last STATE
+        self._flush_child_contexts()
+
+    def prefetch_records(self, contexts: List[dict]) -> None:
+        """Fetch the records for many independent contexts concurrently.
+
+        Results are held until sync() is called for the same context, which
+        keeps the emitted RECORD and STATE messages in context order.
+        """
+        with ThreadPoolExecutor(max_workers=self.detail_concurrency) as executor:
+            futures = [
+                executor.submit(list, self.request_records(context))
+                for context in contexts
+            ]
+            try:
+                for context, future in zip(contexts, futures):
+                    key = self.context_key(context)
+                    self._prefetched_records[key] = future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                self._prefetched_records.clear()
+                raise
+
+    def checkpoints(self, kind: str) -> dict:
+        """Return this stream's checkpoints of a kind from the tap state."""
+        checkpoints = self.tap_state.setdefault("checkpoints", {})
+        return checkpoints.setdefault(kind, {}).setdefault(self.name, {})
+
+    def is_subtree_complete(self, child_context: dict) -> bool:
+        """True if an earlier, interrupted run synced this whole subtree."""
+        if self._completed_subtrees is None:
+            completed = self.tap_state.get("checkpoints", {}).get("completed", {})
+            self._completed_subtrees = set(completed.get(self.name, {}))
+        return self.context_key(child_context) in self._completed_subtrees
+
+    def _write_state_message(self) -> None:
+        """Write a STATE message, timing it for the run's state stats."""
+        if defers_state_messages():
+            # Written once the siblings are done, see _sync_child_streams
+            self.increment_run_stat("state_messages_deferred")
+            return
+        start = time.perf_counter()
+        super()._write_state_message()
+        self._tap.state_stats["state_messages"] += 1
+        self._tap.state_stats["state_write_seconds"] += time.perf_counter() - start
+        if self._tap.completed_sprints is not None:
+            # The state now covers the sprints synced so far
+            self._tap.completed_sprints.flush()
+
+    def mark_subtree_complete(self, child_context: dict) -> None:
+        """Checkpoint a child context once its whole subtree is synced."""
+        key = self.context_key(child_context)
+        self.is_subtree_complete(child_context)
+        self._completed_subtrees.add(key)
+        self.checkpoints("completed")[key] = True
+        self._write_state_message()
+
+    def _sync_children(self, child_context: dict) -> None:
+        """Sync children now, or batch them up when fanning out."""
+        if self.checkpoint_subtrees and self.is_subtree_complete(child_context):
+            self.increment_run_stat("checkpointed_subtrees_skipped")
+            return
+        for child_stream in self.child_streams:
+            if child_stream.accepts_parent_records and self._current_record:
+                child_stream.accept_parent_record(child_context, self._current_record)
+        if not self.fans_out_children:
+            self._sync_subtree(child_context)
+            return
+        self._pending_child_contexts.append(child_context)
+        self._held_parent_writes.append([])
+        if len(self._pending_child_contexts) >= self.detail_concurrency * 10:
+            self._flush_child_contexts()
+
+    def _flush_child_contexts(self) -> None:
+        """Prefetch the batched child contexts, then sync them in order.
+
+        The records whose children were batched are written after those
+        children, and only then counted in the bookmark, as without batching.
+        """
+        contexts = self._pending_child_contexts
+        held_parent_writes = self._held_parent_writes
+        self._pending_child_contexts = []
+        self._held_parent_writes = []
+        if not contexts:
+            return
+        for child_stream in self.child_streams:
+            if child_stream.concurrent_contexts and (
+                child_stream.selected or child_stream.has_selected_descendents
+            ):
+                child_stream.prefetch_records(contexts)
+        for context, parent_writes in zip(contexts, held_parent_writes):
+            self._sync_subtree(context)
+            for parent_write in parent_writes:
+                parent_write()
+
+    def _write_record_message(self, record: dict) -> None:
+        if self._held_parent_writes:
+            # Its children are still batched
+            self._held_parent_writes[-1].append(
+                partial(super()._write_record_message, record)
+            )
+            return
+        super()._write_record_message(record)
+
+    def _increment_stream_state(
+        self, latest_record: Dict[str, Any], *, context: Optional[dict] = None
+    ) -> None:
+        if self._held_parent_writes:
+            # Not before the record is written, see _write_record_message
+            self._held_parent_writes[-1].append(
+                partial(super()._increment_stream_state, latest_record, context=context)
+            )
+            return
+        super()._increment_stream_state(latest_record, context=context)
+
+    def _sync_subtree(self, child_context: dict) -> None:
+        engine = self._tap.async_engine
+        if not self.async_subtrees or engine is None:
+            self._sync_child_streams(child_context)
+        else:
+            engine.crawl(self, child_context, self._current_record)
+            try:
+                self._sync_child_streams(child_context)
+            finally:
+                engine.clear()
+        if self.checkpoint_subtrees:
+            self.mark_subtree_complete(child_context)
+
+    @property
+    def sibling_concurrency(self) -> int:
+        """Number of threads the child streams of a record are synced on."""
+        if not self.concurrent_children:
+            return 1
+        return max(int(self.config.get("sibling_concurrency", 1)), 1)
+
+    def _sync_child_streams(self, child_context: dict) -> None:
+        """Sync every child stream for child_context.
+
+        With concurrent_children and sibling_concurrency set the children
+        run on threads. Their messages are written in the usual child stream
+        order (see run_in_order), and the STATE messages they'd write are
+        replaced by one each time more of them have all their records out,
+        see sibling_checkpoint. Requests still share the tap wide rate
+        limiter.
+        """
+        children = [
+            child_stream
+            for child_stream in self.child_streams
+            if child_stream.selected or child_stream.has_selected_descendents
+        ]
+        if self.sibling_concurrency < 2 or len(children) < 2:
+            super()._sync_children(child_context)
+            return
+        subtrees = {
+            child_stream.name: child_stream.subtree_stream_names
+            for child_stream in children
+        }
+        started = self.sibling_start_state(set().union(*subtrees.values()))
+        tasks = [
+            SiblingTask(
+                name=child_stream.name,
+                run=partial(child_stream.sync, context=child_context),
+            )
+            for child_stream in children
+        ]
+        output_stats = run_in_order(
+            tasks,
+            self.sibling_concurrency,
+            max_buffered=self.config.get("sibling_max_buffered_messages", 10000),
+            checkpoint=partial(self.sibling_checkpoint, started, subtrees),
+        )
+        self.increment_run_stat("concurrent_sibling_syncs")
+        self.increment_run_stat("buffered_writes", output_stats["buffered_writes"])
+        self.increment_run_stat("buffer_full_waits", output_stats["buffer_full_waits"])
+        self._write_state_message()
+
+    @property
+    def subtree_stream_names(self) -> Set[str]:
+        """Return the names of this stream and every stream below it."""
+        names = {self.name}
+        for child_stream in self.child_streams:
+            names |= child_stream.subtree_stream_names
+        return names
+
+    def sibling_start_state(self, stream_names: Set[str]) -> dict:
+        """Copy the bookmarks and checkpoints of the streams before they run."""
+        checkpoints = self.tap_state.get("checkpoints", {})
+        return {
+            "bookmarks": {
+                stream_name: copy.deepcopy(bookmark)
+                for stream_name, bookmark in self.tap_state.get("bookmarks", {}).items()
+                if stream_name in stream_names
+            },
+            "checkpoints": {
+                kind: {
+                    stream_name: copy.deepcopy(stream_checkpoints)
+                    for stream_name, stream_checkpoints in kind_checkpoints.items()
+                    if stream_name in stream_names
+                }
+                for kind, kind_checkpoints in checkpoints.items()
+            },
+        }
+
+    def sibling_checkpoint(
+        self, started: dict, subtrees: Dict[str, Set[str]], synced: Set[str]
+    ) -> str:
+        """Return a STATE message covering the siblings synced so far.
+
+        The siblings still running may have records buffered, their streams
+        keep the bookmarks and checkpoints they started with (see
+        sibling_start_state). Those entries are swapped out of a shallow copy
+        of the state, so nothing the running siblings change is read.
+        """
+        running = {
+            stream_name
+            for sibling, stream_names in subtrees.items()
+            if sibling not in synced
+            for stream_name in stream_names
+        }
+
+        def restored(current: dict, start: dict) -> dict:
+            entries = dict(current)
+            for stream_name in running:
+                if stream_name in start:
+                    entries[stream_name] = start[stream_name]
+                else:
+                    entries.pop(stream_name, None)
+            return entries
+
+        state = dict(self.tap_state)
+        state["bookmarks"] = restored(state.get("bookmarks", {}), started["bookmarks"])
+        if "checkpoints" in state:
+            state["checkpoints"] = {
+                kind: restored(kind_checkpoints, started["checkpoints"].get(kind, {}))
+                for kind, kind_checkpoints in dict(state["checkpoints"]).items()
+            }
+        # Completed sprints are only stored with a full STATE message, see
+        # _write_state_message
+        self.increment_run_stat("sibling_checkpoints")
+        self._tap.state_stats["state_messages"] += 1
+        return singer.format_message(StateMessage(value=state)) + "\n"
+
+    def walks_children(self, child_context: dict, record: dict) -> bool:
+        """True when the sync will walk the children of record.
+
+        Asked by the async engine ahead of the sync, so it mustn't change
+        anything.
+        """
+        return not (
+            self.checkpoint_subtrees and self.is_subtree_complete(child_context)
+        )
+
+    def predict_record(self, row: dict, context: Optional[dict]) -> Optional[dict]:
+        """Return the record the sync will make of row, None if it drops it.
+
+        Asked by the async engine ahead of the sync, so it mustn't change
+        anything.
+        """
+        record = dict(row)
+        for key, value in (context or {}).items():
+            record.setdefault(key, value)
+        return record
+
+    def resumed_page_token(self, context: Optional[dict]) -> Optional[Any]:
+        """Return the page an interrupted run left off at, see checkpoint_page."""
+        if not self.checkpoint_pages:
+            return None
+        pages = self.tap_state.get("checkpoints", {}).get("pages", {})
+        return pages.get(self.name, {}).get(self.context_key(context))
+
+    def _sync_records(self, context: Optional[dict] = None) -> None:
+        super()._sync_records(context)
+        if self.checkpoint_pages:
+            self.checkpoints("pages").pop(self.context_key(context), None)
+
+    def checkpoint_page(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> Optional[Any]:
+        """Record that the pages before next_page_token are done.
+
+        Called as the pages of a context are reached. For the first one (no
+        token) returns the page an interrupted run left off at instead.
+        """
+        pages = self.checkpoints("pages")
+        if next_page_token is None:
+            # Resume where an interrupted run left off
+            next_page_token = pages.get(self.context_key(context))
+            if next_page_token is not None:
+                self.increment_run_stat("checkpointed_page_resumes")
+        else:
+            # Every record of the earlier pages, and their children, is
+            # synced by the time the next page is reached
+            self._flush_child_contexts()
+            pages[self.context_key(context)] = next_page_token
+            self._write_state_message()
+        return next_page_token
+
+    def prepare_request(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> requests.PreparedRequest:
+        # The authenticator may refresh its token in here, which shouldn't
+        # happen from several threads at once
+        with self._tap.request_lock:
+            return super().prepare_request(context, next_page_token)
+
+    @property
+    def response_cache_ttl(self) -> Optional[float]:
+        """Seconds a cached response stays fresh, None when not cached."""
+        if self._tap.response_cache is None:
+            return None
+        ttls = self.config.get("response_cache_ttls") or {}
+        return ttls.get(self.name, self.cache_ttl)
+
+    def _request(
+        self, prepared_request: requests.PreparedRequest, context: Optional[dict]
+    ) -> requests.Response:
+        cached_response = None
+        if self.response_cache_ttl:
+            cache_key = self._tap.response_cache.key_for(prepared_request)
+            cached_response = self._tap.response_cache.get(cache_key)
+        if cached_response is not None:
+            if cached_response.age() < self.response_cache_ttl:
+                self.increment_run_stat("cache_hits")
+                return cached_response.to_response(prepared_request)
+            prepared_request.headers.update(cached_response.conditional_headers())
+
+        response = self._prefetched_response(prepared_request)
+        if response is None:
+            response = self._send(prepared_request, context)
+
+        if cached_response is not None and response.status_code == 304:
+            self.increment_run_stat("cache_revalidated")
+            self._tap.response_cache.touch(cached_response.key)
+            return cached_response.to_response(prepared_request)
+        if self.response_cache_ttl and response.status_code == 200:
+            self.increment_run_stat("cache_misses")
+            self._tap.response_cache.put(cache_key, response)
+        return response
+
+    def _prefetched_response(
+        self, prepared_request: requests.PreparedRequest
+    ) -> Optional[requests.Response]:
+        """Return the response the async engine already got for this request."""
+        if self._tap.async_engine is None:
+            return None
+        response = self._tap.async_engine.pop(prepared_request.url)
+        if response is None:
+            return None
+        self.increment_run_stat("async_prefetched_responses")
+        # Its body was decoded by the crawl, and is reused as it is
+        response.request = prepared_request
+        return response
+
+    def _send(
+        self, prepared_request: requests.PreparedRequest, context: Optional[dict]
+    ) -> requests.Response:
+        """Send the request, slowing down or pausing when the API pushes back.
+
+        Throttled responses lower the tap wide request rate and are retried
+        (up to max_throttled_retries times). Lockouts open the circuit
+        breaker, which holds every request until a probe gets through.
+        """
+        rate_limiter = self._tap.rate_limiter
+        circuit_breaker = self._tap.circuit_breaker
+        throttled_retries = 0
+        while True:
+            locked_out_seconds = circuit_breaker.wait_time()
+            while locked_out_seconds > 0:
+                self.increment_run_stat("locked_out_seconds", locked_out_seconds)
+                self.increment_metric("locked_out_seconds", locked_out_seconds)
+                time.sleep(locked_out_seconds)
+                locked_out_seconds = circuit_breaker.wait_time()
+            # Wait for our turn in the tap wide API budget before dispatching,
+            # so concurrent requests can't overshoot it
+            throttled_seconds = rate_limiter.acquire()
+            if throttled_seconds > 0:
+                self.logger.debug(
+                    f"API Limit reached, waited {throttled_seconds} seconds."
+                )
+            self.increment_run_stat("throttled_seconds", throttled_seconds)
+            self.increment_run_stat("requests_sent")
+            self.increment_metric("throttled_seconds", throttled_seconds)
+            self.increment_metric("requests")
+            streamed = self.streams_json_pages
+            start = time.perf_counter()
+            try:
+                with connection_owner(self), streamed_responses(streamed):
+                    response = super()._request(prepared_request, context)
+            except APILockoutError:
+                if not circuit_breaker.record_lockout():
+                    raise
+                self.increment_run_stat("lockouts")
+                self.logger.warning("Locked out of the API, pausing all requests.")
+                continue
+            except APIThrottledError:
+                circuit_breaker.release_probe()
+                rate_limiter.throttled()
+                self.increment_run_stat("throttled_responses")
+                self.increment_metric("throttled_responses")
+                throttled_retries += 1
+                if throttled_retries > self.max_throttled_retries:
+                    raise
+                continue
+            except BaseException:
+                circuit_breaker.release_probe()
+                raise
+            finally:
+                self.observe_metric("request_seconds", time.perf_counter() - start)
+            rate_limiter.succeeded()
+            circuit_breaker.record_success()
+            if streamed and response._content is False:
+                # Counted by _stream_unfurl once the body is read
+                setattr(response, _STREAMED_BODY_ATTRIBUTE, True)
+            else:
+                self.observe_metric("response_bytes", len(response.content))
+            return response
+
+    @property
+    def requests_session(self) -> requests.Session:
+        """Return the pooled session shared by every stream of the tap."""
+        return self._tap.requests_session
+
+    @property
+    def timeout(self) -> float:
+        """Return the seconds to wait on a response, the http_timeout_seconds."""
+        return self.config.get("http_timeout_seconds", 300)
+
     @property
     @cached
     def authenticator(self) -> ZohoSprintsAuthenticator:
@@ -73,7 +967,7 @@ class ZohoSprintsStream(RESTStream):
         #       pagination loop.
         if self.next_page_token_jsonpath:
             all_matches = extract_jsonpath(
-                self.next_page_token_jsonpath, response.json()
+                self.next_page_token_jsonpath, self.response_json(response)
             )
             first_match = next(iter(all_matches), None)
             next_page_token = first_match
@@ -107,46 +1001,36 @@ class ZohoSprintsStream(RESTStream):
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
         # TODO: Parse response body and return a set of records.
-        yield from extract_jsonpath(self.records_jsonpath, input=response.json())
+        yield from extract_jsonpath(
+            self.records_jsonpath, input=self.response_json(response)
+        )
 
     def post_process(self, row: dict, context: Optional[dict]) -> dict:
         """As needed, append or transform raw data to match expected structure."""
         # TODO: Delete this method if not needed.
         return row
 
-    def api_limit_checker(self):
-        now = time.time()
-        api_time_bins = 60
-        requests_per_bin = 30
-        if (
-            self._tap.api_limit_number_of_calls_since_last_checkpoint
-            >= requests_per_bin
-        ):
-            # How much time to sleepy for?
-            sleepy_time = api_time_bins - (now - self._tap.api_limit_last_checkpoint)
-            if sleepy_time >= 0:
-                self.logger.info(
-                    f"API Limit reached, sleeping for {sleepy_time} seconds."
-                )
-                time.sleep(sleepy_time)
-            self._tap.api_limit_number_of_calls_since_last_checkpoint = 0
-            self._tap.api_limit_last_checkpoint = time.time()
-        self._tap.api_limit_number_of_calls_since_last_checkpoint = (
-            self._tap.api_limit_number_of_calls_since_last_checkpoint + 1
-        )
-
     def validate_response(self, response):
-        # API Limit, cheeky putting it here but I don't have a better spot
-        self.api_limit_checker()
-        data = response.json()
+        self._tap.rate_limiter.update_from_headers(response.headers)
+        if response.status_code == 304:
+            # Not modified, _request serves the body from the response cache
+            return
+        if response.status_code == 429:
+            raise APIThrottledError(
+                f"429 Too Many Requests for path: {self.path}, slowing down."
+            )
+        if response.ok and _peek_streamed_body(response):
+            # Too big to be an error, reading it here would defeat streaming
+            return
+        data = self.response_json(response)
 
         msg = (
             f"{response.status_code} Client Error: "
             f"{response.reason} for path: {self.path}"
             f". Response content: {response.content}"
         )
-        if data.get("code") == 7602.1:
-            raise FatalAPIError(f"Error, locked out of the API. {msg}")
+        if data.get("code") == LOCKOUT_CODE:
+            raise APILockoutError(f"Error, locked out of the API. {msg}")
 
         if 400 <= response.status_code < 500:
             raise FatalAPIError(msg)
@@ -156,15 +1040,292 @@ class ZohoSprintsStream(RESTStream):
         super().validate_response(response)
 
 
+def _peek_streamed_body(response: requests.Response) -> bool:
+    """Return True if the body is left unread for a streaming parse.
+
+    The first _PEEK_MAX_BYTES are read. A body that ends within them is
+    kept in response.content, to be decoded and validated as usual, so an
+    error in a 2xx response is raised before the circuit breaker records a
+    success. Otherwise the bytes read are kept for _stream_unfurl.
+    """
+    if response._content is not False:
+        # Not streamed, or already read
+        return False
+    peeked = b""
+    for chunk in response.raw.stream(_PEEK_MAX_BYTES, decode_content=True):
+        peeked += chunk
+        if len(peeked) > _PEEK_MAX_BYTES:
+            setattr(response, _PEEKED_BYTES_ATTRIBUTE, peeked)
+            return True
+    response._content = peeked
+    response._content_consumed = True
+    return False
+
+
+def parse_zoho_timestamp(value: Any) -> Optional[datetime]:
+    """Zoho sends timestamps as epoch milliseconds or ISO 8601 strings."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
 class ZohoSprintsPropsStream(ZohoSprintsStream):
     next_page_token_jsonpath = "$.nextIndex"
 
+    # Properties of the unfurled record that say when it last changed. The
+    # newest one becomes the replication_key value. When none of them are in
+    # the response the record is treated as changed at the start of this run.
+    modified_time_properties: Optional[List[str]] = None
+    # Drop unchanged records along with their child streams (no detail calls).
+    # When False unchanged records aren't emitted but children are still synced.
+    prune_unchanged_subtrees: bool = True
+    _starting_modified_time: Optional[datetime] = None
+    # Whether a record without any modified_time_properties has been logged
+    _warned_missing_modified_time = False
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return a generator of row-type dictionary objects."""
+        self._starting_modified_time = None
+        if self.replication_key:
+            self._starting_modified_time = parse_zoho_timestamp(
+                self.get_starting_replication_key_value(context)
+            )
+        yield from super().get_records(context)
+
+    def modified_time(self, row: dict, record_stats: bool = True) -> datetime:
+        """Return when the unfurled record last changed.
+
+        With record_stats False (predictions) missing properties aren't
+        counted or logged.
+        """
+        properties = self.config.get(
+            "modified_time_properties", self.modified_time_properties
+        )
+        timestamps = [
+            parse_zoho_timestamp(row["record"].get(property_name))
+            for property_name in properties or []
+        ]
+        timestamps = [timestamp for timestamp in timestamps if timestamp]
+        if not timestamps:
+            if record_stats:
+                self.increment_run_stat("modified_time_missing")
+                if not self._warned_missing_modified_time:
+                    self._warned_missing_modified_time = True
+                    self.logger.warning(
+                        f"None of the modified_time_properties {properties} are "
+                        f"in '{self.name}' records, they are re-synced every run."
+                    )
+            return self._tap.sync_started_at
+        return max(timestamps)
+
+    def predict_record(self, row: dict, context: Optional[dict]) -> Optional[dict]:
+        """post_process without side effects, see ZohoSprintsStream."""
+        record = super().predict_record(row, context)
+        if not self.replication_key:
+            return record
+        record[self.replication_key] = self.modified_time(
+            row, record_stats=False
+        ).isoformat()
+        if self.prune_unchanged_subtrees:
+            starting_modified_time = parse_zoho_timestamp(
+                self.peek_starting_replication_key_value(context)
+            )
+            modified_time = parse_zoho_timestamp(record[self.replication_key])
+            if (
+                starting_modified_time is not None
+                and modified_time is not None
+                and modified_time <= starting_modified_time
+            ):
+                return None
+        return record
+
+    def peek_starting_replication_key_value(self, context: Optional[dict]) -> Any:
+        """get_starting_replication_key_value, without adding a state partition."""
+        bookmark = self.tap_state.get("bookmarks", {}).get(self.name, {})
+        partition_context = self._get_state_partition_context(context)
+        if partition_context:
+            bookmark = next(
+                (
+                    partition
+                    for partition in bookmark.get("partitions", [])
+                    if partition["context"] == partition_context
+                ),
+                {},
+            )
+        value = bookmark.get("replication_key_value")
+        if value is None and self.is_timestamp_replication_key:
+            return self.config.get("start_date")
+        return value
+
+    def is_unchanged(self, row: dict) -> bool:
+        """True when the record hasn't changed since our bookmark."""
+        if not self.replication_key or self._starting_modified_time is None:
+            return False
+        modified_time = parse_zoho_timestamp(row.get(self.replication_key))
+        return (
+            modified_time is not None and modified_time <= self._starting_modified_time
+        )
+
+    def post_process(self, row: dict, context: Optional[dict]) -> Optional[dict]:
+        """Lift the modified time up to the replication_key."""
+        if not self.replication_key:
+            return row
+        row[self.replication_key] = self.modified_time(row).isoformat()
+        if self.prune_unchanged_subtrees and self.is_unchanged(row):
+            self.increment_run_stat("unchanged_records_skipped")
+            return None
+        return row
+
+    def _write_record_message(self, record: dict) -> None:
+        # Only reachable for unchanged records when prune_unchanged_subtrees
+        # is off, their children have been synced but the record itself hasn't
+        # changed
+        if self.is_unchanged(record):
+            self.increment_run_stat("unchanged_records_skipped")
+            return
+        super()._write_record_message(record)
+
+    # Records asked for per page (the range parameter), None for endpoints
+    # that aren't paged. Overridable with the page_sizes setting, then tuned
+    # as the run goes, see tune_page_size
+    page_size: Optional[int] = 100
+    # Largest range tune_page_size grows to, overridable with max_page_size
+    max_page_size: int = 1000
+    _tuned_page_size: Optional[int] = None
+    # Range the endpoint turned out to cap pages at
+    _page_size_limit: Optional[int] = None
+
+    # Envelope keys that came after the JObj on the last streamed page, None
+    # before the first one. See _stream_unfurl
+    _envelope_keys_after_jobj: Optional[Set[str]] = None
+
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
 
         # Raise if not implemented
         raise (NotImplementedError)
 
+    def unfurl(
+        self,
+        response: requests.Response,
+        prop_key: str,
+        ids_key: str,
+        jobj_key: str,
+        primary_key_name: str,
+    ) -> Iterable[dict]:
+        """property_unfurler, parsing streamed bodies as they're read."""
+        if getattr(response, _STREAMED_BODY_ATTRIBUTE, False):
+            yield from self._stream_unfurl(
+                response, prop_key, ids_key, jobj_key, primary_key_name
+            )
+        else:
+            yield from property_unfurler(
+                response,
+                prop_key,
+                ids_key,
+                jobj_key,
+                primary_key_name,
+                mappers=self.record_mappers,
+                projection=self.projection,
+            )
+
+    def _stream_unfurl(
+        self,
+        response: requests.Response,
+        prop_key: str,
+        ids_key: str,
+        jobj_key: str,
+        primary_key_name: str,
+    ) -> Iterable[dict]:
+        """Yield each JObj entry as a record as soon as it has been parsed.
+
+        A record needs the _prop and every envelope key, so entries can only
+        be yielded as they're parsed when those come before the JObj. Pages
+        of one endpoint share their layout: the first page is held back
+        whole, later pages stream when it had nothing after its JObj. Records
+        follow the order of the JObj rather than the Ids.
+        """
+        # Spool the body so the connection goes back to the pool right away,
+        # rather than once the children of every record on the page synced
+        body = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+        try:
+            body.write(getattr(response, _PEEKED_BYTES_ATTRIBUTE, b""))
+            response.raw.decode_content = True
+            shutil.copyfileobj(response.raw, body)
+        finally:
+            response.close()
+        setattr(response, _BODY_BYTES_ATTRIBUTE, body.tell())
+        self.observe_metric("response_bytes", body.tell())
+        body.seek(0)
+
+        projection = self.projection
+        dropped_keys = projection.keys if projection else frozenset()
+        dropped_properties = projection.record_properties if projection else frozenset()
+        envelope: Dict = {}
+        mapper: Optional[Callable[[List], dict]] = None
+        keys_after_jobj: Set[str] = set()
+        jobj_seen = False
+        held_back: List = []
+        with body:
+            events = ijson.parse(body, use_float=True)
+            for prefix, event, key in events:
+                if prefix or event != "map_key":
+                    continue
+                if key == jobj_key:
+                    jobj_seen = True
+                    stream_records = (
+                        mapper is not None and self._envelope_keys_after_jobj == set()
+                    )
+                    for id, prop_values in _iter_json_map(events):
+                        if stream_records:
+                            self.increment_run_stat("streamed_records")
+                            yield _unfurled_record(
+                                envelope,
+                                mapper,
+                                primary_key_name,
+                                id,
+                                prop_values,
+                            )
+                        else:
+                            held_back.append((id, prop_values))
+                    continue
+                if key == ids_key or key in dropped_keys:
+                    _skip_json_value(events)
+                    continue
+                value = _build_json_value(events)
+                if key == prop_key:
+                    mapper = self.record_mappers.get(value, dropped_properties)
+                else:
+                    envelope[key] = value
+                    if jobj_seen:
+                        keys_after_jobj.add(key)
+        if envelope.get("code") == LOCKOUT_CODE:
+            raise APILockoutError(
+                f"Error, locked out of the API for path: {self.path}. "
+                f"Response content: {envelope}"
+            )
+        self._envelope_keys_after_jobj = keys_after_jobj
+        # What's left of the body, for get_next_page_token
+        setattr(response, _DECODED_BODY_ATTRIBUTE, envelope)
+        self.increment_run_stat("streamed_pages")
+        self.increment_run_stat("held_back_records", len(held_back))
+        for id, prop_values in held_back:
+            yield _unfurled_record(
+                envelope,
+                mapper or _compile_mapper(()),
+                primary_key_name,
+                id,
+                prop_values,
+            )
+
     def get_next_page_token(
         self, response: requests.Response, previous_token: Optional[Any]
     ) -> Optional[Any]:
@@ -174,22 +1335,90 @@ class ZohoSprintsPropsStream(ZohoSprintsStream):
         #       pagination loop.
         if self.next_page_token_jsonpath:
             all_matches = extract_jsonpath(
-                self.next_page_token_jsonpath, response.json()
+                self.next_page_token_jsonpath, self.response_json(response)
             )
             first_match = next(iter(all_matches), None)
             next_page_token = first_match
         else:
             next_page_token = None
 
+        self.tune_page_size(response, next_page_token is not None)
         return next_page_token
 
+    @property
+    def current_page_size(self) -> Optional[int]:
+        """Range to ask for on the next page, None for endpoints not paged."""
+        if self.page_size is None:
+            return None
+        if self._tuned_page_size is None:
+            page_sizes = self.config.get("page_sizes") or {}
+            self._tuned_page_size = min(
+                int(page_sizes.get(self.name, self.page_size)),
+                self.max_page_size_setting,
+            )
+        return self._tuned_page_size
+
+    @property
+    def max_page_size_setting(self) -> int:
+        """Largest range to ask for, the max_page_size setting or our default."""
+        return int(self.config.get("max_page_size", self.max_page_size))
+
+    @property
+    def tunes_page_sizes(self) -> bool:
+        """The page_size_tuning setting.
+
+        Always off with the async engine, whose requests have to match the
+        ones the sync sends.
+        """
+        return self._tap.async_engine is None and self.config.get(
+            "page_size_tuning", True
+        )
+
+    def tune_page_size(self, response: requests.Response, has_next_page: bool) -> None:
+        """Adjust the range to the page we just got.
+
+        Doubled while full pages come back in under half of page_max_seconds
+        and page_max_mb, halved when a page goes over either. A page holding
+        fewer records than asked for with more to come means the endpoint
+        caps the range, the cap then bounds the range for the rest of the run.
+        """
+        page_size = self.current_page_size
+        if page_size is None or not self.tunes_page_sizes:
+            return
+        max_seconds = self.config.get("page_max_seconds", 10)
+        max_bytes = self.config.get("page_max_mb", 5) * 1024 * 1024
+        seconds = response.elapsed.total_seconds()
+        body_bytes = getattr(response, _BODY_BYTES_ATTRIBUTE, None)
+        if body_bytes is None:
+            body_bytes = len(response.content)
+        if has_next_page and 0 < self._page_records < page_size:
+            self._page_size_limit = self._page_records
+            tuned_page_size = self._page_records
+        elif seconds > max_seconds or body_bytes > max_bytes:
+            tuned_page_size = max(page_size // 2, 1)
+        elif has_next_page and seconds < max_seconds / 2 and body_bytes < max_bytes / 2:
+            tuned_page_size = min(
+                page_size * 2,
+                self._page_size_limit or self.max_page_size_setting,
+            )
+        else:
+            return
+        if tuned_page_size != page_size:
+            self.logger.debug(
+                f"Page size for '{self.name}' tuned from {page_size} to "
+                f"{tuned_page_size} ({self._page_records} records, "
+                f"{seconds:.2f} seconds, {body_bytes} bytes)."
+            )
+            self.increment_run_stat("page_size_changes")
+            self._tuned_page_size = tuned_page_size
+
     def get_url_params(
         self, context: Optional[dict], next_page_token: Optional[Any]
     ) -> Dict[str, Any]:
         """Return a dictionary of values to be used in URL parameterization."""
         params: dict = {}
         params["index"] = 1
-        params["range"] = 100
+        params["range"] = self.current_page_size
         if next_page_token:
             params["index"] = next_page_token
         # if self.replication_key:
@@ -198,12 +1427,79 @@ class ZohoSprintsPropsStream(ZohoSprintsStream):
         return params
 
 
+class RecordMappers:
+    """Functions building the record dict from a JObj list, one per _prop.
+
+    Every page of an endpoint carries the same _prop, so the mapping is
+    compiled once (to a function returning a dict display) and looked up by
+    the _prop's hash on later pages instead of being walked for every record.
+    """
+
+    def __init__(self):
+        self._mappers: Dict[Tuple, Callable[[List], dict]] = {}
+        self._lock = threading.Lock()
+        # Lookups served from the cache (hits) or compiled (misses)
+        self.stats: Counter = Counter()
+
+    def get(
+        self, props: Dict[str, int], dropped: FrozenSet[str] = frozenset()
+    ) -> Callable[[List], dict]:
+        """Return the mapper for a _prop dict, compiling it on first use.
+
+        Properties in dropped are left out of the records it builds.
+        """
+        key = (tuple(props.items()), dropped)
+        mapper = self._mappers.get(key)
+        if not getattr(_uncounted_lookups, "enabled", False):
+            with self._lock:
+                self.stats["hits" if mapper is not None else "misses"] += 1
+        if mapper is None:
+            mapper = self._mappers[key] = _compile_mapper(
+                tuple(item for item in props.items() if item[0] not in dropped)
+            )
+        return mapper
+
+
+def _compile_mapper(property_indexes: Tuple) -> Callable[[List], dict]:
+    # A function returning one dict display with the keys as constants beats
+    # both a comprehension over the _prop and dict(zip(names, itemgetter()))
+    items = ", ".join(
+        f"{str(property_name)!r}: prop_values[{int(property_index)}]"
+        for property_name, property_index in property_indexes
+    )
+    namespace: Dict[str, Any] = {}
+    exec(f"def mapper(prop_values):\n    return {{{items}}}\n", namespace)
+    return namespace["mapper"]
+
+
+# For callers without a stream to keep the mappers on
+_SHARED_RECORD_MAPPERS = RecordMappers()
+# Whether RecordMappers lookups on this thread are left out of the stats
+_uncounted_lookups = threading.local()
+
+
+@contextmanager
+def uncounted_mapper_lookups() -> Iterator[None]:
+    """Leave the RecordMappers lookups made inside this block out of the stats.
+
+    For parses of pages the sync parses again, like the async engine's.
+    """
+    previous = getattr(_uncounted_lookups, "enabled", False)
+    _uncounted_lookups.enabled = True
+    try:
+        yield
+    finally:
+        _uncounted_lookups.enabled = previous
+
+
 def property_unfurler(
     response: requests.Response,
     prop_key: str,
     ids_key: str,
     jobj_key: str,
     primary_key_name: str,
+    mappers: Optional[RecordMappers] = None,
+    projection: Optional[Projection] = None,
 ) -> Iterable[dict]:
     """
     Zohosprints embeds data inside of a JObj key.
@@ -230,23 +1526,78 @@ def property_unfurler(
     Maybe this is the wrong decision? Post an issue, and let us know your
     thoughts!
 
-    Parse the response and return an iterator of result rows.
+    Parse the response and return an iterator of result rows. Properties
+    and keys in projection aren't selected and are left out.
     """
-    # Create a record object
-    json = response.json()
-    props: Dict = json.get(prop_key)
-    ids: List = json.get(ids_key)
+    body = decode_response(response)
+    props: Dict = body.get(prop_key)
+    ids: List = body.get(ids_key)
+    jobj: Dict = body[jobj_key]
+    # Everything except the three big keys is shared by every record on the
+    # page, build it once instead of deep copying the whole page per record
+    dropped_keys = projection.keys if projection else frozenset()
+    envelope: Dict = {
+        key: value
+        for key, value in body.items()
+        if key not in (prop_key, ids_key, jobj_key) and key not in dropped_keys
+    }
+    mapper = (mappers or _SHARED_RECORD_MAPPERS).get(
+        props, projection.record_properties if projection else frozenset()
+    )
     for id in ids:
-        record = {}
-        prop_values: List = json[jobj_key][id]
-        for property_name, property_index in props.items():
-            record[property_name] = prop_values[property_index]
-        return_object: Dict = copy.deepcopy(json)
-        return_object[primary_key_name] = id
-        return_object.pop(prop_key)
-        return_object.pop(ids_key)
-        return_object.pop(jobj_key)
-        return_object["record"] = record
-        yield return_object
-
-    return {}
+        yield _unfurled_record(envelope, mapper, primary_key_name, id, jobj[id])
+
+
+def _unfurled_record(
+    envelope: Dict,
+    mapper: Callable[[List], dict],
+    primary_key_name: str,
+    id: str,
+    prop_values: List,
+) -> dict:
+    # Nested envelope values (userDisplayName and the like) grow with the page
+    # and are shared read-only by its records, copying them per record would
+    # make unfurling quadratic again
+    return_object: Dict = dict(envelope)
+    return_object[primary_key_name] = id
+    return_object["record"] = mapper(prop_values)
+    return return_object
+
+
+def _build_json_value(events: Iterator[tuple]) -> Any:
+    """Build the JSON value starting at the next ijson event."""
+    builder = ObjectBuilder()
+    depth = 0
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth == 0:
+            break
+    return builder.value
+
+
+def _skip_json_value(events: Iterator[tuple]) -> None:
+    """Consume the events of the JSON value starting at the next event."""
+    depth = 0
+    for _, event, _ in events:
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _iter_json_map(events: Iterator[tuple]) -> Iterator[tuple]:
+    """Yield (key, value) for each entry of the map starting at the next event."""
+    _, event, _ = next(events)
+    if event != "start_map":
+        # null instead of an empty map
+        return
+    for _, event, key in events:
+        if event == "end_map":
+            return
+        yield key, _build_json_value(events)
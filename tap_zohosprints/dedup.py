@@ -0,0 +1,42 @@
+"""Run scoped de-duplication of records reachable through several parents."""
+
+import threading
+from collections import Counter, OrderedDict
+from typing import Hashable
+
+
+class SeenIndex:
+    """Bounded, thread safe set of the keys seen during this run.
+
+    Once max_size keys are held the least recently seen key is evicted, so
+    memory stays flat on huge portals at the cost of possibly fetching an
+    evicted key a second time.
+    """
+
+    def __init__(self, max_size: int = 1_000_000):
+        self.max_size = max(int(max_size), 1)
+        self._seen: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def add(self, key: Hashable) -> bool:
+        """Add key to the index, return False if it was already there."""
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                self.stats["duplicates"] += 1
+                return False
+            self._seen[key] = None
+            self.stats["added"] += 1
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+                self.stats["evicted"] += 1
+            return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return True if key was seen, without refreshing it."""
+        with self._lock:
+            return key in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
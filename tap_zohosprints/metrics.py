@@ -0,0 +1,244 @@
+"""Per stream and endpoint request metrics, summarized at the end of a run."""
+
+import json
+import math
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds of the histogram buckets, by histogram
+HISTOGRAM_BUCKETS: Dict[str, Tuple[float, ...]] = {
+    # Seconds from sending a request to having its response
+    "request_seconds": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    "response_bytes": (1e3, 1e4, 1e5, 1e6, 1e7),
+    # Records parsed out of each page
+    "page_records": (0, 1, 10, 100, 1000),
+}
+# Summary quantiles of each histogram, logged and written to JSON
+QUANTILES = (0.5, 0.95, 0.99)
+# Counters emitted as Singer timers, the rest are Singer counters
+_TIMERS = {"throttled_seconds", "locked_out_seconds", "decode_seconds"}
+
+
+class Histogram:
+    """Bucketed distribution of observed values, like Prometheus'."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # One count per bucket, then the values over the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = next(
+            (index for index, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q quantile.
+
+        The largest value observed stands in for the bounds above it.
+        """
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self.max)
+                break
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        summary = {"count": self.count, "sum": round(self.sum, 3)}
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}"] = round(self.quantile(q), 3)
+        summary["max"] = round(self.max, 3)
+        return summary
+
+    def snapshot(self) -> dict:
+        return {"counts": list(self.counts), "sum": self.sum, "max": self.max}
+
+    def merge(self, snapshot: dict) -> None:
+        for index, count in enumerate(snapshot["counts"]):
+            self.counts[index] += count
+        self.count += sum(snapshot["counts"])
+        self.sum += snapshot["sum"]
+        self.max = max(self.max, snapshot["max"])
+
+
+class EndpointMetrics:
+    """Histograms and counters of the requests to one endpoint template."""
+
+    def __init__(self):
+        self.histograms = {
+            name: Histogram(buckets) for name, buckets in HISTOGRAM_BUCKETS.items()
+        }
+        # requests, records, throttled_responses, throttled_seconds,
+        # locked_out_seconds, decode_seconds
+        self.counters: Counter = Counter()
+
+
+class RunMetrics:
+    """Thread safe metrics of a run, keyed by stream and endpoint template.
+
+    The endpoint template is the stream's path before the context is filled
+    in, so every sprint's item list lands in the same bucket. Worker
+    processes send a snapshot() back to be merge()d into the parent's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+
+    def _endpoint(self, stream_name: str, endpoint: str) -> EndpointMetrics:
+        key = (stream_name, endpoint)
+        if key not in self._endpoints:
+            self._endpoints[key] = EndpointMetrics()
+        return self._endpoints[key]
+
+    def observe(self, stream_name: str, endpoint: str, name: str, value: float):
+        """Add a value to one of the HISTOGRAM_BUCKETS histograms."""
+        with self._lock:
+            self._endpoint(stream_name, endpoint).histograms[name].observe(value)
+
+    def increment(
+        self, stream_name: str, endpoint: str, name: str, amount: float = 1
+    ) -> None:
+        with self._lock:
+            self._endpoint(stream_name, endpoint).counters[name] += amount
+
+    def snapshot(self) -> List[dict]:
+        """Return the metrics as plain data, to merge into another process'."""
+        with self._lock:
+            return [
+                {
+                    "stream": stream_name,
+                    "endpoint": endpoint,
+                    "counters": dict(metrics.counters),
+                    "histograms": {
+                        name: histogram.snapshot()
+                        for name, histogram in metrics.histograms.items()
+                    },
+                }
+                for (stream_name, endpoint), metrics in self._endpoints.items()
+            ]
+
+    def merge(self, snapshot: List[dict]) -> None:
+        with self._lock:
+            for entry in snapshot:
+                metrics = self._endpoint(entry["stream"], entry["endpoint"])
+                metrics.counters.update(entry["counters"])
+                for name, histogram in entry["histograms"].items():
+                    metrics.histograms[name].merge(histogram)
+
+    def summary(self) -> List[dict]:
+        """Return the counters and histogram quantiles of every endpoint."""
+        with self._lock:
+            summary = []
+            for (stream_name, endpoint), metrics in sorted(self._endpoints.items()):
+                entry: Dict[str, Any] = {"stream": stream_name, "endpoint": endpoint}
+                entry.update(
+                    (name, round(value, 3)) for name, value in metrics.counters.items()
+                )
+                requests = metrics.counters["requests"]
+                if requests:
+                    entry["records_per_request"] = round(
+                        metrics.counters["records"] / requests, 1
+                    )
+                for name, histogram in metrics.histograms.items():
+                    if histogram.count:
+                        entry[name] = histogram.summary()
+                summary.append(entry)
+            return summary
+
+    def singer_metrics(self) -> List[dict]:
+        """Return the summary as Singer METRIC points, one per metric."""
+        points = []
+        for entry in self.summary():
+            tags = {"stream": entry["stream"], "endpoint": entry["endpoint"]}
+            for name, value in entry.items():
+                if name in tags:
+                    continue
+                if isinstance(value, dict):
+                    points.append(
+                        {
+                            "type": "histogram",
+                            "metric": name,
+                            "value": value["sum"],
+                            "tags": {**tags, **value},
+                        }
+                    )
+                else:
+                    points.append(
+                        {
+                            "type": "timer" if name in _TIMERS else "counter",
+                            "metric": name,
+                            "value": value,
+                            "tags": tags,
+                        }
+                    )
+        return points
+
+    def prometheus_text(self, prefix: str = "tap_zohosprints") -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+        counter_names = sorted(
+            {name for _, metrics in endpoints for name in metrics.counters}
+        )
+        for name in counter_names:
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (stream_name, endpoint), metrics in endpoints:
+                if name in metrics.counters:
+                    labels = _prometheus_labels(stream_name, endpoint)
+                    lines.append(f"{metric}{{{labels}}} {metrics.counters[name]}")
+        for name in HISTOGRAM_BUCKETS:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for (stream_name, endpoint), metrics in endpoints:
+                histogram = metrics.histograms[name]
+                labels = _prometheus_labels(stream_name, endpoint)
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(
+        self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None
+    ) -> None:
+        """Write the JSON summary and Prometheus textfile, where asked for."""
+        if json_path:
+            _replace_file(json_path, json.dumps(self.summary(), indent=2))
+        if prometheus_path:
+            _replace_file(prometheus_path, self.prometheus_text())
+
+
+def _prometheus_labels(stream_name: str, endpoint: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"')
+
+    return f'stream="{escape(stream_name)}",endpoint="{escape(endpoint)}"'
+
+
+def _replace_file(path: str, text: str) -> None:
+    # Collectors reading the file never see it half written
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as file:
+        file.write(text)
+    os.replace(temporary_path, path)
@@ -0,0 +1,406 @@
+"""Partitioned sync of projects across worker processes."""
+
+import copy
+import json
+import queue
+import sys
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+from typing import Any, Callable, Dict, List, Mapping, Set
+
+from tap_zohosprints.rate_limit import CircuitBreaker, RateLimiter
+
+# Response headers the shared limiter needs to see
+_RATE_LIMIT_HEADERS = (
+    "Retry-After",
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+)
+# Singer messages sent to the parent at once
+_BATCH_SIZE = 100
+
+
+class PartitionManager(SyncManager):
+    """Hosts the state shared by the worker processes.
+
+    The request budget, and the circuit breaker since a lockout applies to
+    the whole account.
+    """
+
+
+PartitionManager.register("RateLimiter", RateLimiter)
+PartitionManager.register("CircuitBreaker", CircuitBreaker)
+
+
+class SharedRateLimiter:
+    """Process local handle on a RateLimiter hosted by PartitionManager.
+
+    Slots are reserved from the shared limiter so all workers together stay
+    inside the API budget, the waiting happens in the calling process.
+    """
+
+    def __init__(self, limiter: Any):
+        self._limiter = limiter
+        self.stats: Counter = Counter()
+
+    def reserve(self) -> float:
+        """Reserve the next request slot, return how long to wait for it."""
+        delay = self._limiter.reserve()
+        self.stats["requests"] += 1
+        self.stats["throttled_seconds"] += delay
+        return delay
+
+    def acquire(self) -> float:
+        """Block until a request may be sent, return the seconds waited."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold every worker's requests for some seconds."""
+        self._limiter.pause(seconds)
+
+    def throttled(self) -> None:
+        """Slow every worker down."""
+        self._limiter.throttled()
+
+    def succeeded(self) -> None:
+        """Speed every worker back up."""
+        self._limiter.succeeded()
+
+    def current_stats(self) -> Dict[str, float]:
+        """Return a copy of the stats of this process' requests."""
+        return dict(self.stats)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Pass rate limit headers on to the shared limiter, if there are any."""
+        rate_limit_headers = {
+            name: headers[name] for name in _RATE_LIMIT_HEADERS if name in headers
+        }
+        if rate_limit_headers:
+            self._limiter.update_from_headers(rate_limit_headers)
+
+
+class PartitionOutput:
+    """Merges the Singer messages of every worker into one stream on stdout.
+
+    SCHEMA messages are written once per stream, and STATE messages are
+    merged into one state covering every partition.
+    """
+
+    def __init__(self, state: dict):
+        self.state = state
+        self._input_state = copy.deepcopy(state)
+        self._schemas_written: Set[str] = set()
+        # records, states and schemas written
+        self.stats: Counter = Counter()
+
+    def write(self, partition_index: int, lines: List[str]) -> None:
+        """Write the messages one worker sent."""
+        for line in lines:
+            message = json.loads(line)
+            if message["type"] == "SCHEMA":
+                if message["stream"] in self._schemas_written:
+                    continue
+                self._schemas_written.add(message["stream"])
+                self.stats["schemas"] += 1
+            elif message["type"] == "STATE":
+                self.merge_state(message["value"])
+                line = json.dumps({"type": "STATE", "value": self.state})
+                self.stats["states"] += 1
+            elif message["type"] == "RECORD":
+                self.stats["records"] += 1
+            sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+    def merge_state(self, worker_state: dict) -> None:
+        """Take every bookmark the worker changed into the merged state.
+
+        Each worker starts from the same input state and only changes the
+        partitions of its own projects, anything still matching the input
+        state is a stale copy and is left alone.
+        """
+        input_bookmarks = self._input_state.get("bookmarks", {})
+        bookmarks = self.state.setdefault("bookmarks", {})
+        for stream_name, worker_bookmark in worker_state.get("bookmarks", {}).items():
+            input_bookmark = input_bookmarks.get(stream_name, {})
+            bookmark = bookmarks.setdefault(stream_name, {})
+            for key, value in worker_bookmark.items():
+                if key == "partitions":
+                    _merge_partitions(
+                        bookmark.setdefault("partitions", []),
+                        input_bookmark.get("partitions", []),
+                        value,
+                    )
+                elif value != input_bookmark.get(key):
+                    bookmark[key] = value
+        # Completed subtrees and pages reached belong to one worker's share
+        for kind, worker_checkpoints in worker_state.get("checkpoints", {}).items():
+            checkpoints = self.state.setdefault("checkpoints", {}).setdefault(kind, {})
+            for stream_name, stream_checkpoints in worker_checkpoints.items():
+                checkpoints.setdefault(stream_name, {}).update(stream_checkpoints)
+
+
+def _merge_partitions(
+    partitions: List[dict], input_partitions: List[dict], worker_partitions: List[dict]
+) -> None:
+    def key(partition: dict) -> str:
+        return json.dumps(partition["context"], sort_keys=True)
+
+    input_by_context = {key(partition): partition for partition in input_partitions}
+    index_by_context = {
+        key(partition): index for index, partition in enumerate(partitions)
+    }
+    for partition in worker_partitions:
+        context_key = key(partition)
+        if partition == input_by_context.get(context_key):
+            continue
+        if context_key in index_by_context:
+            partitions[index_by_context[context_key]] = partition
+        else:
+            index_by_context[context_key] = len(partitions)
+            partitions.append(partition)
+
+
+class _QueueWriter:
+    """Stand in for stdout in a worker, sends whole lines to the parent."""
+
+    def __init__(self, messages: Any, partition_index: int):
+        self._messages = messages
+        self._partition_index = partition_index
+        self._buffer = ""
+        self._lines: List[str] = []
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        if "\n" in self._buffer:
+            *lines, self._buffer = self._buffer.split("\n")
+            self._lines.extend(line for line in lines if line)
+            if len(self._lines) >= _BATCH_SIZE:
+                self._send()
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._buffer:
+            self._lines.append(self._buffer)
+            self._buffer = ""
+        self._send()
+
+    def _send(self) -> None:
+        if self._lines:
+            self._messages.put((self._partition_index, self._lines))
+            self._lines = []
+
+
+def _sync_partition(
+    tap_class: type,
+    partition_index: int,
+    config: dict,
+    catalog: dict,
+    state: dict,
+    prefetched: Dict[str, Dict[str, List[dict]]],
+    messages: Any,
+    limiter: Any,
+    circuit_breaker: Any,
+) -> List[dict]:
+    """Worker process, sync the share of the tap given by config.
+
+    prefetched holds the responses the parent already has, by stream name
+    and context_key(), they're served instead of requesting them again.
+    Returns the worker's request metrics, see RunMetrics.snapshot.
+    """
+    output = _QueueWriter(messages, partition_index)
+    sys.stdout = output
+    try:
+        tap = tap_class(config=config, catalog=catalog, state=state)
+        for stream_name, records in prefetched.items():
+            tap.streams[stream_name]._prefetched_records.update(records)
+        tap.rate_limiter = SharedRateLimiter(limiter)
+        tap.circuit_breaker = circuit_breaker
+        tap.sync_in_process()
+        tap.log_run_stats()
+        return tap.metrics.snapshot()
+    finally:
+        output.close()
+
+
+def list_project_ids(tap: Any, portal_contexts: List[dict]) -> List[str]:
+    """Return the ids of every project the tap would sync, in every portal.
+
+    The project lists stay prefetched on the meta_project stream.
+    """
+    meta_projects = tap.streams["meta_project"]
+    meta_projects.prefetch_records(portal_contexts)
+    project_lists = dict(meta_projects._prefetched_records)
+    project_ids = [
+        project["projectId"]
+        for portal_context in portal_contexts
+        for project in meta_projects.get_records(portal_context)
+    ]
+    meta_projects._prefetched_records.update(project_lists)
+    return project_ids
+
+
+def deselect_streams(catalog: dict, stream_names: Set[str]) -> dict:
+    """Return a copy of the catalog with the streams deselected."""
+    catalog = copy.deepcopy(catalog)
+    for entry in catalog["streams"]:
+        if entry["tap_stream_id"] not in stream_names:
+            continue
+        root = [item for item in entry["metadata"] if not item["breadcrumb"]]
+        if not root:
+            root = [{"breadcrumb": [], "metadata": {}}]
+            entry["metadata"].append(root[0])
+        root[0]["metadata"]["selected"] = False
+    return catalog
+
+
+def descendant_streams(tap: Any, stream_name: str) -> Set[str]:
+    """Return the names of the streams below stream_name."""
+    ancestor = type(tap.streams[stream_name])
+    descendants = set()
+    for stream in tap.streams.values():
+        parent = stream.parent_stream_type
+        while parent is not None and parent is not ancestor:
+            parent = parent.parent_stream_type
+        if parent is not None:
+            descendants.add(stream.name)
+    return descendants
+
+
+def sync_partitioned(tap: Any) -> bool:
+    """Split the tap across worker processes and sync the shares in parallel.
+
+    With project_workers set the projects of every portal are split across
+    that many workers, with portal_workers set each portal gets a worker of
+    its own when there is more than one. Every worker runs the whole tap
+    restricted to its share (project_ids or portal_ids), starting from the
+    team record and project lists the parent fetched to split the work. The
+    streams above the share (team and tags) are only synced by the first
+    worker. Requests are paced
+    by one RateLimiter hosted in a manager process, so the workers together
+    stay inside the API budget. Returns False, without syncing anything,
+    when neither is set or there's nothing to split.
+    """
+    workers = tap.config.get("project_workers", 1)
+    if workers < 2 and not tap.config.get("portal_workers"):
+        return False
+    portal_contexts = tap.streams["team"].portal_contexts()
+    if workers < 2 and len(portal_contexts) < 2:
+        return False
+
+    local_limiter = tap.rate_limiter
+    local_circuit_breaker = tap.circuit_breaker
+    manager = PartitionManager()
+    manager.start()
+    try:
+        limiter = manager.RateLimiter(
+            requests_per_period=tap.config.get("rate_limit_requests", 30),
+            period=tap.config.get("rate_limit_period_seconds", 60),
+            burst=tap.config.get("rate_limit_burst", 5),
+        )
+        # The requests we already sent count against the shared budget too
+        for _ in range(int(local_limiter.stats["requests"])):
+            limiter.reserve()
+        tap.rate_limiter = SharedRateLimiter(limiter)
+        circuit_breaker = manager.CircuitBreaker(
+            cooldown=tap.config.get("lockout_cooldown_seconds", 60),
+            max_open_seconds=tap.config.get("lockout_max_seconds", 3600),
+        )
+        tap.circuit_breaker = circuit_breaker
+
+        if workers > 1:
+            project_ids = list_project_ids(tap, portal_contexts)
+            partitions = [
+                {"project_ids": project_ids[index::workers]}
+                for index in range(min(workers, len(project_ids)))
+            ]
+            partitioned_streams = {"meta_project"} | descendant_streams(
+                tap, "meta_project"
+            )
+        else:
+            partitions = [
+                {"portal_ids": [portal_context["myTeamId"]]}
+                for portal_context in portal_contexts
+            ]
+            partitioned_streams = descendant_streams(tap, "team")
+        if len(partitions) < 2:
+            return False
+
+        tap.logger.info(f"Syncing in {len(partitions)} worker processes: {partitions}")
+        prefetched = {
+            stream_name: dict(tap.streams[stream_name]._prefetched_records)
+            for stream_name in ("team", "meta_project")
+        }
+        catalog = tap.input_catalog.to_dict() if tap.input_catalog else tap.catalog_dict
+        shared_catalog = deselect_streams(
+            catalog, set(tap.streams) - partitioned_streams
+        )
+        output = PartitionOutput(tap.state)
+        messages = manager.Queue()
+        start = time.perf_counter()
+
+        def log_finished(partition_index: int) -> Callable[[Future], None]:
+            def callback(future: Future) -> None:
+                outcome = "finished"
+                if future.cancelled() or future.exception():
+                    outcome = "failed"
+                tap.logger.info(
+                    f"Worker {partition_index} {partitions[partition_index]} "
+                    f"{outcome} after {time.perf_counter() - start:.1f} seconds"
+                )
+
+            return callback
+
+        with ProcessPoolExecutor(len(partitions)) as executor:
+            futures = []
+            for partition_index, partition in enumerate(partitions):
+                future = executor.submit(
+                    _sync_partition,
+                    type(tap),
+                    partition_index,
+                    {**tap.config, **partition},
+                    shared_catalog if partition_index else catalog,
+                    copy.deepcopy(tap.state),
+                    prefetched,
+                    messages,
+                    limiter,
+                    circuit_breaker,
+                )
+                future.add_done_callback(log_finished(partition_index))
+                futures.append(future)
+            while True:
+                try:
+                    output.write(*messages.get(timeout=0.1))
+                except queue.Empty:
+                    if all(future.done() for future in futures):
+                        break
+            # Anything sent between the last get and the workers finishing
+            while True:
+                try:
+                    output.write(*messages.get_nowait())
+                except queue.Empty:
+                    break
+            for future in futures:
+                tap.metrics.merge(future.result())
+        tap.clear_checkpoints()
+        partition_stats: Dict[str, Any] = dict(output.stats)
+        partition_stats["workers"] = len(partitions)
+        partition_stats["seconds"] = round(time.perf_counter() - start, 3)
+        tap.logger.info(f"Partition stats: {partition_stats}")
+        tap.logger.info(f"Shared rate limiter stats: {limiter.current_stats()}")
+        tap.logger.info(
+            f"Shared circuit breaker stats: {circuit_breaker.current_stats()}"
+        )
+        return True
+    finally:
+        manager.shutdown()
+        tap.rate_limiter = local_limiter
+        tap.circuit_breaker = local_circuit_breaker
@@ -0,0 +1,283 @@
+"""Client side rate limiting for the ZohoSprints API."""
+
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, Mapping, Optional
+
+
+class RateLimiter:
+    """Thread safe token bucket with a hard sliding window cap.
+
+    The token bucket refills at requests_per_period / period tokens per second
+    and holds at most burst tokens, which spreads requests out evenly instead
+    of firing the whole budget and then idling. The sliding window guarantees
+    we never send more than requests_per_period requests inside any period,
+    whatever the burst is set to.
+
+    Callers reserve a slot before dispatching a request. Reservations are
+    handed out in order, so concurrent callers queue up fairly instead of
+    stampeding when the window opens.
+
+    The refill rate adapts AIMD style: every throttled() response cuts it by
+    decrease_factor (down to min_fraction of the configured rate), every
+    succeeded() one adds back, increase_per_period requests per period for
+    each period of successes, up to the configured rate.
+    """
+
+    def __init__(
+        self,
+        requests_per_period: int = 30,
+        period: float = 60,
+        burst: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        decrease_factor: float = 0.5,
+        increase_per_period: float = 2,
+        min_fraction: float = 0.1,
+    ):
+        self.period = float(period)
+        self.burst = max(int(burst), 1)
+        self.decrease_factor = decrease_factor
+        self.increase_per_period = increase_per_period
+        self.min_fraction = min_fraction
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._set_requests_per_period(requests_per_period)
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        # Dispatch times of the reservations in the last period
+        self._window: Deque[float] = deque()
+        # requests, throttled_seconds (waiting for a slot), idle_seconds
+        # (budget left unused while the bucket was full), header_pauses,
+        # peak_utilization (most requests in one period / requests_per_period),
+        # rate_decreases and lowest_rate_fraction (of the configured rate)
+        self.stats: Counter = Counter()
+
+    def _set_requests_per_period(self, requests_per_period: int) -> None:
+        self.requests_per_period = max(int(requests_per_period), 1)
+        self.max_rate = self.requests_per_period / self.period
+        self.rate = min(getattr(self, "rate", self.max_rate), self.max_rate)
+        # Dispatch times of the most recent requests_per_period reservations
+        self._scheduled: Deque[float] = deque(
+            getattr(self, "_scheduled", ()), maxlen=self.requests_per_period
+        )
+
+    def _refill(self, now: float) -> None:
+        if now <= self._updated:
+            return
+        if self._tokens >= self.burst:
+            self.stats["idle_seconds"] += now - self._updated
+        else:
+            full_at = self._updated + (self.burst - self._tokens) / self.rate
+            if now > full_at:
+                self.stats["idle_seconds"] += now - full_at
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Reserve the next request slot, return how long to wait for it."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            start = max(now, self._blocked_until)
+            if self._tokens < 1:
+                start = max(start, now + (1 - self._tokens) / self.rate)
+            if len(self._scheduled) == self.requests_per_period:
+                start = max(start, self._scheduled[0] + self.period)
+            if self._scheduled:
+                start = max(start, self._scheduled[-1])
+            self._tokens -= 1
+            self._scheduled.append(start)
+            self._window.append(start)
+            while self._window[0] <= start - self.period:
+                self._window.popleft()
+            self.stats["peak_utilization"] = max(
+                self.stats["peak_utilization"],
+                len(self._window) / self.requests_per_period,
+            )
+            delay = start - now
+            self.stats["requests"] += 1
+            self.stats["throttled_seconds"] += delay
+            return delay
+
+    def acquire(self) -> float:
+        """Block until a request may be sent, return the seconds waited."""
+        delay = self.reserve()
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def throttled(self) -> None:
+        """Multiplicative decrease, the API told us to slow down."""
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = max(
+                self.rate * self.decrease_factor, self.max_rate * self.min_fraction
+            )
+            self.stats["rate_decreases"] += 1
+            self.stats["lowest_rate_fraction"] = min(
+                self.stats.get("lowest_rate_fraction", 1), self.rate / self.max_rate
+            )
+
+    def succeeded(self) -> None:
+        """Additive increase back towards the configured rate."""
+        with self._lock:
+            if self.rate >= self.max_rate:
+                return
+            self._refill(self._clock())
+            # rate * period successes in a period add increase_per_period
+            increase = self.increase_per_period / self.period
+            self.rate = min(
+                self.rate + increase / (self.rate * self.period), self.max_rate
+            )
+
+    def current_stats(self) -> Dict[str, float]:
+        """Return a copy of stats, for callers holding a proxy of the limiter."""
+        with self._lock:
+            return dict(self.stats)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request that hasn't been reserved yet for some seconds."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+            self.stats["header_pauses"] += 1
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt to any rate limit headers the API sent back.
+
+        Honours Retry-After, pauses until X-RateLimit-Reset once
+        X-RateLimit-Remaining hits zero, and lowers our budget if
+        X-RateLimit-Limit is stricter than the configured one.
+        """
+        limit = _header_number(headers, "X-RateLimit-Limit")
+        if limit is not None and 0 < limit < self.requests_per_period:
+            with self._lock:
+                self._set_requests_per_period(int(limit))
+
+        retry_after = _header_number(headers, "Retry-After")
+        remaining = _header_number(headers, "X-RateLimit-Remaining")
+        if retry_after is not None:
+            self.pause(retry_after)
+        elif remaining is not None and remaining <= 0:
+            reset = _header_number(headers, "X-RateLimit-Reset")
+            if reset is None:
+                reset = self.period
+            elif reset > 1e9:  # An epoch timestamp rather than a delta
+                reset = max(reset - time.time(), 0)
+            self.pause(reset)
+
+
+class CircuitBreaker:
+    """Stops every request while we're locked out of the API.
+
+    Closed, requests flow. A lockout opens the breaker: nothing is sent
+    until the cooldown is over. Then it's half open, a single probe request
+    is let through. If it succeeds the breaker closes again, if it's locked
+    out too the breaker opens with twice the cooldown (up to max_cooldown).
+    record_lockout() returns False once we've been locked out for longer
+    than max_open_seconds, the caller should give up then.
+
+    Methods return how long to wait rather than sleeping, so the breaker
+    can be shared between processes through a manager proxy.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # How often callers check back while a probe is in flight
+    PROBE_POLL_SECONDS = 1.0
+
+    def __init__(
+        self,
+        cooldown: float = 60,
+        max_cooldown: float = 900,
+        max_open_seconds: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.cooldown = float(cooldown)
+        self.max_cooldown = float(max_cooldown)
+        self.max_open_seconds = float(max_open_seconds)
+        self.state = self.CLOSED
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_cooldown = self.cooldown
+        self._open_until = 0.0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # lockouts, probes, locked_out_seconds
+        self.stats: Counter = Counter()
+
+    def wait_time(self) -> float:
+        """Return how long to wait before sending a request, 0 to send now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0
+            now = self._clock()
+            if self.state == self.OPEN:
+                if now < self._open_until:
+                    return self._open_until - now
+                self.state = self.HALF_OPEN
+            if self._probe_in_flight:
+                return self.PROBE_POLL_SECONDS
+            self._probe_in_flight = True
+            self.stats["probes"] += 1
+            return 0
+
+    def is_closed(self) -> bool:
+        """True while requests flow normally, no lockout being waited out."""
+        with self._lock:
+            return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        """A request went through, close the breaker if it was probing."""
+        with self._lock:
+            if self.state != self.HALF_OPEN:
+                return
+            self.stats["locked_out_seconds"] += self._clock() - self._opened_at
+            self.state = self.CLOSED
+            self._next_cooldown = self.cooldown
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The probe failed for some other reason, let another caller probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_lockout(self) -> bool:
+        """Open the breaker, return False when it's time to give up."""
+        with self._lock:
+            now = self._clock()
+            self.stats["lockouts"] += 1
+            if self.state == self.CLOSED:
+                self._opened_at = now
+            elif self.state == self.OPEN:
+                # Sent before the breaker opened, already accounted for
+                return True
+            if now - self._opened_at >= self.max_open_seconds:
+                return False
+            self.state = self.OPEN
+            self._open_until = now + self._next_cooldown
+            self._next_cooldown = min(self._next_cooldown * 2, self.max_cooldown)
+            self._probe_in_flight = False
+            return True
+
+    def current_stats(self) -> Dict[str, float]:
+        """Return a copy of stats, for callers holding a proxy of the breaker."""
+        with self._lock:
+            return dict(self.stats)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,198 @@
+"""Concurrent sync of sibling streams, their output kept in order."""
+
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Where the Singer messages written on this thread go, and whether its
+# STATE messages are held back, see run_in_order
+_thread_output = threading.local()
+
+
+class SiblingTask(NamedTuple):
+    """One sibling stream's sync, run by run_in_order."""
+
+    name: str
+    run: Callable[[], None]
+
+
+class _StdoutRouter:
+    """Stand in for stdout, sends each thread's writes where it's routed.
+
+    Threads without a route write to the stdout the router replaced.
+    """
+
+    def __init__(self, stdout: Any):
+        self.stdout = stdout
+
+    def write(self, text: str) -> int:
+        route = getattr(_thread_output, "route", None)
+        if route is None:
+            return self.stdout.write(text)
+        route(text)
+        return len(text)
+
+    def flush(self) -> None:
+        if getattr(_thread_output, "route", None) is None:
+            self.stdout.flush()
+
+
+def _current_writer() -> Callable[[str], Any]:
+    """Return where writes to stdout from this thread end up."""
+    route = getattr(_thread_output, "route", None)
+    if route is not None:
+        return route
+    stdout = sys.stdout
+    if isinstance(stdout, _StdoutRouter):
+        stdout = stdout.stdout
+    return stdout.write
+
+
+def defers_state_messages() -> bool:
+    """True on threads syncing a sibling, whose STATE messages are held back.
+
+    The state is shared by every sibling, a STATE message written by one
+    could carry the progress of another whose records are still buffered.
+    """
+    return getattr(_thread_output, "defer_state", False)
+
+
+class OrderedOutput:
+    """Writes the output of several sections in section order.
+
+    The first unfinished section writes straight through, the ones after it
+    are buffered until every section before them is done. A section holding
+    max_buffered writes waits for the sections before it instead of
+    buffering more.
+    """
+
+    def __init__(
+        self,
+        sections: int,
+        write: Callable[[str], Any],
+        max_buffered: Optional[int] = None,
+    ):
+        self._write = write
+        self._buffers: List[List[str]] = [[] for _ in range(sections)]
+        self._done = [False] * sections
+        self._head = 0
+        self.max_buffered = max_buffered
+        self._advanced = threading.Condition()
+        # buffered_writes, most_buffered_writes, buffer_full_waits
+        self.stats: Counter = Counter()
+
+    @property
+    def written_sections(self) -> int:
+        """Number of sections, from the first, whose output is all written."""
+        return self._head
+
+    def writer(self, section: int) -> Callable[[str], None]:
+        """Return the write function of one section."""
+
+        def write(text: str) -> None:
+            with self._advanced:
+                if (
+                    self.max_buffered
+                    and section != self._head
+                    and len(self._buffers[section]) >= self.max_buffered
+                ):
+                    self.stats["buffer_full_waits"] += 1
+                    self._advanced.wait_for(lambda: section == self._head)
+                if section == self._head:
+                    self._write(text)
+                    return
+                self._buffers[section].append(text)
+                self.stats["buffered_writes"] += 1
+                self.stats["most_buffered_writes"] = max(
+                    self.stats["most_buffered_writes"], len(self._buffers[section])
+                )
+
+        return write
+
+    def finish(self, section: int) -> None:
+        """Mark a section done, writing out the buffers it was holding up."""
+        with self._advanced:
+            self._done[section] = True
+            while self._head < len(self._done) and self._done[self._head]:
+                self._head += 1
+                if self._head < len(self._buffers):
+                    for text in self._buffers[self._head]:
+                        self._write(text)
+                    self._buffers[self._head] = []
+            self._advanced.notify_all()
+
+    def write_between(self, text: str) -> None:
+        """Write text straight out, between the writes of the sections."""
+        with self._advanced:
+            self._write(text)
+
+
+def _run_section(output: OrderedOutput, section: int, run: Callable[[], None]):
+    _thread_output.route = output.writer(section)
+    _thread_output.defer_state = True
+    try:
+        run()
+    finally:
+        _thread_output.route = None
+        _thread_output.defer_state = False
+
+
+def run_in_order(
+    tasks: List[SiblingTask],
+    max_workers: int,
+    max_buffered: Optional[int] = None,
+    checkpoint: Optional[Callable[[Set[str]], str]] = None,
+) -> Counter:
+    """Run the tasks on up to max_workers threads, their output in task order.
+
+    Tasks start in order. Their writes to stdout are passed through or
+    buffered by an OrderedOutput (up to max_buffered writes per task), so
+    they come out as if the tasks had run one after the other. Whenever
+    more tasks have all their output written, but not all of them yet, the
+    text checkpoint returns for the names of those tasks is written after
+    it. Once a task fails the ones not started yet are cancelled, the
+    running ones are waited for and the first error is raised. Returns the
+    OrderedOutput stats.
+    """
+    output = OrderedOutput(len(tasks), _current_writer(), max_buffered)
+    running: Dict[Future, Tuple[int, SiblingTask]] = {}
+    errors: List[BaseException] = []
+    written = 0
+    router = None
+    if not isinstance(sys.stdout, _StdoutRouter):
+        router = sys.stdout = _StdoutRouter(sys.stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            # Started in section order, so the section writing straight
+            # through is always running and the ones waiting on it get going
+            for section, task in enumerate(tasks):
+                future = executor.submit(_run_section, output, section, task.run)
+                running[future] = (section, task)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    section, task = running.pop(future)
+                    output.finish(section)
+                    if future.cancelled():
+                        continue
+                    if future.exception() is not None:
+                        errors.append(future.exception())
+                        for other in running:
+                            other.cancel()
+                if (
+                    checkpoint is not None
+                    and not errors
+                    and written < output.written_sections < len(tasks)
+                ):
+                    written = output.written_sections
+                    output.write_between(
+                        checkpoint({task.name for task in tasks[:written]})
+                    )
+    finally:
+        if router is not None:
+            sys.stdout = router.stdout
+    if errors:
+        raise errors[0]
+    return output.stats
@@ -0,0 +1,109 @@
+"""One pooled HTTP session shared by every ZohoSprints stream."""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# The stream sending a request on this thread, new connections are
+# counted against it
+_request_owner = threading.local()
+# Whether requests sent on this thread leave the body to be streamed
+_streamed_responses = threading.local()
+
+
+@contextmanager
+def connection_owner(stream: Any) -> Iterator[None]:
+    """Attribute connections opened inside this block to stream."""
+    previous = getattr(_request_owner, "stream", None)
+    _request_owner.stream = stream
+    try:
+        yield
+    finally:
+        _request_owner.stream = previous
+
+
+@contextmanager
+def streamed_responses(enabled: bool = True) -> Iterator[None]:
+    """Leave the body of responses received inside this block unread.
+
+    The body is then read from response.raw by whoever parses it, instead
+    of being downloaded into memory by requests.
+    """
+    previous = getattr(_streamed_responses, "enabled", False)
+    _streamed_responses.enabled = enabled
+    try:
+        yield
+    finally:
+        _streamed_responses.enabled = previous
+
+
+def _count_new_connection() -> None:
+    stream = getattr(_request_owner, "stream", None)
+    if stream is not None:
+        stream.increment_run_stat("new_connections")
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts new connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class StreamingSession(requests.Session):
+    """Session whose stream default is set per thread, see streamed_responses."""
+
+    @property
+    def stream(self) -> bool:
+        return getattr(_streamed_responses, "enabled", False)
+
+    @stream.setter
+    def stream(self, value: bool) -> None:
+        # requests.Session.__init__ sets the default, the thread decides
+        pass
+
+
+def build_session(pool_size: int = 10, max_retries: int = 3) -> requests.Session:
+    """Return a keep-alive session tuned for lots of small API calls.
+
+    max_retries only covers connection level failures (resets, timeouts
+    while connecting), HTTP status retries are left to the streams. The
+    timeout is passed with every request, see ZohoSprintsStream.timeout.
+    """
+    session = StreamingSession()
+    adapter = PooledHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            # Retry-After is handled by the tap's RateLimiter
+            respect_retry_after_header=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    session.headers["Connection"] = "keep-alive"
+    return session
@@ -0,0 +1,104 @@
+"""Persistent index of completed sprints whose subtree has been synced."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+# Zoho's sprintType for completed and canceled sprints, they don't change
+CLOSED_SPRINT_TYPES = (3, 4)
+
+
+def sprint_fingerprint(record: dict, streams: Iterable[str] = ()) -> str:
+    """Return a hash of a sprint's properties, to notice it changing.
+
+    streams are the names of the streams synced below the sprint, a subtree
+    synced without one of them has to be walked again once it's selected.
+    """
+    encoded = json.dumps(
+        {"record": record, "streams": sorted(streams)}, sort_keys=True, default=str
+    ).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CompletedSprintIndex:
+    """SQLite backed record of the closed sprints synced in earlier runs.
+
+    Each sprint is stored with the fingerprint of its record when its items
+    and users were last synced. As long as the sprint comes back with the
+    same fingerprint, and was verified less than max_age seconds ago, its
+    subtree doesn't need walking again.
+
+    Sprints are staged as their subtrees are synced and only stored by
+    flush, once a STATE message covering their records has been written.
+    An interrupted run then never leaves behind sprints whose records the
+    target didn't get the state for.
+    """
+
+    def __init__(self, path: str, max_age: Optional[float] = None):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS completed_sprints ("
+            " sprint_id TEXT PRIMARY KEY,"
+            " fingerprint TEXT NOT NULL,"
+            " verified_at REAL NOT NULL)"
+        )
+        # Fingerprints of the sprints synced since the last flush, by id
+        self._staged: Dict[str, str] = {}
+        # skipped, changed, expired, stored
+        self.stats: Counter = Counter()
+
+    def is_verified(
+        self, sprint_id: str, fingerprint: str, record_stats: bool = True
+    ) -> bool:
+        """Return True if the sprint's subtree is synced and can't have changed.
+
+        Pass record_stats=False to look without counting it in the stats.
+        """
+        stats = self.stats if record_stats else Counter()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fingerprint, verified_at FROM completed_sprints"
+                " WHERE sprint_id = ?",
+                (sprint_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            stored_fingerprint, verified_at = row
+            if stored_fingerprint != fingerprint:
+                stats["changed"] += 1
+                return False
+            if self.max_age is not None and time.time() - verified_at > self.max_age:
+                stats["expired"] += 1
+                return False
+            stats["skipped"] += 1
+            return True
+
+    def add(self, sprint_id: str, fingerprint: str) -> None:
+        """Record that the sprint's whole subtree has just been synced."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completed_sprints VALUES (?, ?, ?)",
+                (sprint_id, fingerprint, time.time()),
+            )
+            self.stats["stored"] += 1
+
+    def stage(self, sprint_id: str, fingerprint: str) -> None:
+        """Remember that the sprint's subtree is synced, stored by flush."""
+        with self._lock:
+            self._staged[sprint_id] = fingerprint
+
+    def flush(self) -> None:
+        """Store the staged sprints, call once a STATE message is written."""
+        with self._lock:
+            staged = self._staged
+            self._staged = {}
+        for sprint_id, fingerprint in staged.items():
+            self.add(sprint_id, fingerprint)
@@ -8,8 +8,10 @@ from singer_sdk import typing as th  # JSON Schema typing helpers
 from tap_zohosprints.client import ZohoSprintsStream
 from tap_zohosprints.client import ZohoSprintsPropsStream
 from tap_zohosprints.client import property_unfurler
+from tap_zohosprints.sprint_index import CLOSED_SPRINT_TYPES, sprint_fingerprint
 import copy
 import requests
+import time
 
 SCHEMAS_DIR = Path(__file__).parent / Path("./schemas")
 
@@ -21,14 +23,56 @@ class TeamsStream(ZohoSprintsStream):
     path = "/teams/"
     primary_keys = ["ownerTeamIds"]
     replication_key = None
+    cache_ttl = 24 * 60 * 60
     # Optionally, you may also use `schema_filepath` in place of `schema`:
     schema_filepath = SCHEMAS_DIR / "team.json"
 
     def get_child_context(self, record: dict, context: Optional[dict]) -> dict:
-        """Return a context dictionary for child streams."""
-        # Need to use this instead of myTeamId as sometimes myTeamId doesn't have an accurate value
-        return {"myTeamId": record["portals"][0]["zsoid"]}
-        # Will not work if someone has more than one portal. In that case we'll need to create multiple team records, one for each portal, or create a child stream for each portal
+        """Return the context of the first portal to sync, see _sync_children."""
+        portal_contexts = self.portal_contexts_of(record)
+        return portal_contexts[0] if portal_contexts else {}
+
+    def portal_contexts_of(self, record: dict) -> List[dict]:
+        """Return the child context of every portal of a team record to sync."""
+        # Need to use zsoid instead of myTeamId as sometimes myTeamId doesn't have an accurate value
+        portal_ids = self.config.get("portal_ids")
+        return [
+            {"myTeamId": portal["zsoid"]}
+            for portal in record["portals"]
+            if not portal_ids or portal["zsoid"] in portal_ids
+        ]
+
+    def _sync_children(self, child_context: dict) -> None:
+        """Sync the streams below every portal, one portal after the other.
+
+        The SDK syncs the children of one context per record, the other
+        portals of the team record are synced from here.
+        """
+        portal_contexts = self.portal_contexts_of(self._current_record)
+        for number, portal_context in enumerate(portal_contexts, start=1):
+            portal_id = portal_context["myTeamId"]
+            self.logger.info(
+                f"Syncing portal {portal_id} ({number} of {len(portal_contexts)})"
+            )
+            start = time.perf_counter()
+            super()._sync_children(portal_context)
+            self.logger.info(
+                f"Synced portal {portal_id} in {time.perf_counter() - start:.1f} seconds"
+            )
+
+    def portal_contexts(self) -> List[dict]:
+        """Return the child context of every portal.
+
+        The team record is fetched once, and served again when the stream
+        is synced.
+        """
+        if self.context_key(None) not in self._prefetched_records:
+            self.prefetch_records([None])
+        return [
+            portal_context
+            for record in self._prefetched_records[self.context_key(None)]
+            for portal_context in self.portal_contexts_of(record)
+        ]
 
 
 class MetaProjectsStream(ZohoSprintsPropsStream):
@@ -43,11 +87,22 @@ class MetaProjectsStream(ZohoSprintsPropsStream):
     parent_stream_type = TeamsStream
     primary_keys = ["projectId"]
     replication_key = None
+    cache_ttl = 60 * 60
+    # Covers the project and everything below it
+    checkpoint_subtrees = True
+    async_subtrees = True
     schema = th.PropertiesList(
         th.Property("projectId", th.StringType),
         th.Property("myTeamId", th.StringType),
     ).to_dict()
     # TODO Pagination
+    def post_process(self, row: dict, context: Optional[dict]) -> Optional[dict]:
+        """Skip projects left out by the project_ids setting."""
+        project_ids = self.config.get("project_ids")
+        if project_ids and row["projectId"] not in project_ids:
+            return None
+        return super().post_process(row, context)
+
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
         # Create a record object
@@ -57,6 +112,8 @@ class MetaProjectsStream(ZohoSprintsPropsStream):
             ids_key="projectIds",
             jobj_key="projectJObj",
             primary_key_name="projectId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
     def get_child_context(self, record: dict, context: Optional[dict]) -> dict:
@@ -72,6 +129,13 @@ class ProjectsStream(ZohoSprintsPropsStream):
     parent_stream_type = MetaProjectsStream
     primary_keys = ["projectId"]
     replication_key = None
+    cache_ttl = 60 * 60
+    page_size = None
+    synthesize_setting = "synthesize_project_details"
+    # Project custom fields are configured per portal
+    synthesize_scope_keys = ["myTeamId"]
+    # Epics, sprints, the backlog and users don't depend on each other
+    concurrent_children = True
     schema_filepath = SCHEMAS_DIR / "project.json"
 
     # TODO can we get rid of this?
@@ -97,6 +161,8 @@ class ProjectsStream(ZohoSprintsPropsStream):
             ids_key="projectIds",
             jobj_key="projectJObj",
             primary_key_name="projectId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
     # TODO get_records needs to make the Project Details object useful
@@ -115,26 +181,14 @@ class TagsStream(ZohoSprintsPropsStream):
     """TagsStream"""
 
     name = "tag"
-    path = "/team/{myTeamId}/tags/?action=data&index=1&range=1000"
+    path = "/team/{myTeamId}/tags/?action=data"
     parent_stream_type = TeamsStream
     primary_keys = ["tagId"]
     replication_key = None
+    cache_ttl = 60 * 60
+    page_size = 1000
     schema_filepath = SCHEMAS_DIR / "tag.json"
 
-    # TODO can we get rid of this?
-    # Needed as this endpoint doesn't take an index/range as other PropsStreams do
-    def get_url_params(
-        self, context: Optional[dict], next_page_token: Optional[Any]
-    ) -> Dict[str, Any]:
-        """Return a dictionary of values to be used in URL parameterization."""
-        params: dict = {}
-        if next_page_token:
-            params["index"] = next_page_token
-        # if self.replication_key:
-        # params["sort"] = "asc"
-        # params["order_by"] = self.replication_key
-        return params
-
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
         # Create a record object
@@ -144,6 +198,8 @@ class TagsStream(ZohoSprintsPropsStream):
             ids_key="zsTagIds",
             jobj_key="zsTagJObj",
             primary_key_name="tagId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
 
@@ -154,7 +210,9 @@ class EpicsStream(ZohoSprintsPropsStream):
     path = "/team/{myTeamId}/projects/{projectId}/epic/?action=data"
     parent_stream_type = ProjectsStream
     primary_keys = ["epicId"]
-    replication_key = None
+    replication_key = "modifiedTime"
+    modified_time_properties = ["lastModifiedTime", "lastUpdatedTime"]
+    checkpoint_pages = True
     schema_filepath = SCHEMAS_DIR / "epic.json"
 
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
@@ -166,6 +224,8 @@ class EpicsStream(ZohoSprintsPropsStream):
             ids_key="epicIds",
             jobj_key="epicJObj",
             primary_key_name="epicId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
 
@@ -176,9 +236,94 @@ class SprintsStream(ZohoSprintsPropsStream):
     path = "/team/{myTeamId}/projects/{projectId}/sprints/?action=data&type=[1,2,3,4]"
     parent_stream_type = ProjectsStream
     primary_keys = ["sprintId"]
-    replication_key = None
+    replication_key = "modifiedTime"
+    modified_time_properties = ["lastModifiedTime", "lastUpdatedTime"]
+    # Items can change without the sprint changing, keep walking them
+    prune_unchanged_subtrees = False
+    checkpoint_subtrees = True
+    checkpoint_pages = True
+    # Read to tell closed sprints apart, see TapZohoSprints.completed_sprints
+    kept_record_properties = ["sprintType"]
     schema_filepath = SCHEMAS_DIR / "sprint.json"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Fingerprints of the closed sprints being synced, keyed by context_key()
+        self._closed_sprint_fingerprints: Dict[str, str] = {}
+
+    @property
+    def selected_descendants(self) -> List[str]:
+        """Names of the selected streams below sprints, sorted."""
+        names = []
+        streams = list(self.child_streams)
+        while streams:
+            stream = streams.pop()
+            if stream.selected:
+                names.append(stream.name)
+            streams.extend(stream.child_streams)
+        return sorted(names)
+
+    def closed_sprint_fingerprint(self, record: dict) -> str:
+        """Fingerprint of the sprint and of the streams synced below it."""
+        return sprint_fingerprint(record["record"], self.selected_descendants)
+
+    @staticmethod
+    def is_closed_sprint(record: dict) -> bool:
+        """True for completed and canceled sprints, which don't change."""
+        return record.get("record", {}).get("sprintType") in CLOSED_SPRINT_TYPES
+
+    def is_verified_closed_sprint(
+        self, record: dict, record_stats: bool = True
+    ) -> bool:
+        """True if record is a closed sprint whose subtree an earlier run synced."""
+        index = self._tap.completed_sprints
+        if (
+            index is None
+            or self.config.get("reverify_completed_sprints")
+            or not self.is_closed_sprint(record)
+        ):
+            return False
+        return index.is_verified(
+            record["sprintId"],
+            self.closed_sprint_fingerprint(record),
+            record_stats=record_stats,
+        )
+
+    def walks_children(self, child_context: dict, record: dict) -> bool:
+        if self.is_verified_closed_sprint(record, record_stats=False):
+            return False
+        return super().walks_children(child_context, record)
+
+    def _sync_children(self, child_context: dict) -> None:
+        """Skip the items and users of sprints closed since an earlier run.
+
+        A completed or canceled sprint doesn't change, once its subtree is
+        synced it's only walked again when the sprint record itself changes,
+        or after completed_sprints_reverify_days.
+        """
+        record = self._current_record
+        if record is not None and self.is_verified_closed_sprint(record):
+            self.increment_run_stat("completed_sprints_skipped")
+            return
+        if (
+            record is not None
+            and self._tap.completed_sprints is not None
+            and self.is_closed_sprint(record)
+        ):
+            self._closed_sprint_fingerprints[
+                self.context_key(child_context)
+            ] = self.closed_sprint_fingerprint(record)
+        super()._sync_children(child_context)
+
+    def _sync_subtree(self, child_context: dict) -> None:
+        super()._sync_subtree(child_context)
+        fingerprint = self._closed_sprint_fingerprints.pop(
+            self.context_key(child_context), None
+        )
+        if fingerprint is not None:
+            # Stored with the next STATE message, see _write_state_message
+            self._tap.completed_sprints.stage(child_context["sprintId"], fingerprint)
+
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
         # Create a record object
@@ -188,6 +333,8 @@ class SprintsStream(ZohoSprintsPropsStream):
             ids_key="sprintIds",
             jobj_key="sprintJObj",
             primary_key_name="sprintId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
     def get_child_context(self, record: dict, context: Optional[dict]) -> dict:
@@ -207,6 +354,7 @@ class BacklogsStream(ZohoSprintsStream):
     parent_stream_type = ProjectsStream
     primary_keys = ["backlogId"]
     replication_key = None
+    checkpoint_subtrees = True
     schema_filepath = SCHEMAS_DIR / "backlog.json"
 
     def get_child_context(self, record: dict, context: Optional[dict]) -> dict:
@@ -225,13 +373,16 @@ class BacklogItemsStream(ZohoSprintsPropsStream):
     path = "/team/{myTeamId}/projects/{projectId}/sprints/{backlogId}/item/?action=sprintitems&subitem=true"
     parent_stream_type = BacklogsStream
     primary_keys = ["itemId"]
-    replication_key = None
+    replication_key = "modifiedTime"
+    modified_time_properties = ["lastModifiedTime", "lastUpdatedTime"]
+    checkpoint_pages = True
+    stream_json_pages = True
     schema_filepath = SCHEMAS_DIR / "item.json"
 
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
         # Create a record object
-        yield from property_unfurler(
+        yield from self.unfurl(
             response=response,
             prop_key="item_prop",
             ids_key="itemIds",
@@ -258,6 +409,13 @@ class BacklogItemDetailsStream(ZohoSprintsPropsStream):
     parent_stream_type = BacklogItemsStream
     primary_keys = ["itemId"]
     replication_key = None
+    concurrent_contexts = True
+    synthesize_setting = "synthesize_item_details"
+    deduplicate_by = "itemId"
+    page_size = None
+    # Full table, so one state entry for the stream rather than a partition
+    # per item
+    state_partitioning_keys: List[str] = []
     schema_filepath = SCHEMAS_DIR / "item.json"
 
     # TODO this is duplicated for ProjectDetails as well
@@ -282,6 +440,8 @@ class BacklogItemDetailsStream(ZohoSprintsPropsStream):
             ids_key="itemIds",
             jobj_key="itemJObj",
             primary_key_name="itemId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
 
@@ -295,13 +455,16 @@ class SprintItemsStream(ZohoSprintsPropsStream):
     path = "/team/{myTeamId}/projects/{projectId}/sprints/{sprintId}/item/?action=sprintitems&subitem=true"
     parent_stream_type = SprintsStream
     primary_keys = ["itemId"]
-    replication_key = None
+    replication_key = "modifiedTime"
+    modified_time_properties = ["lastModifiedTime", "lastUpdatedTime"]
+    checkpoint_pages = True
+    stream_json_pages = True
     schema_filepath = SCHEMAS_DIR / "item.json"
 
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
         """Parse the response and return an iterator of result rows."""
         # Create a record object
-        yield from property_unfurler(
+        yield from self.unfurl(
             response=response,
             prop_key="item_prop",
             ids_key="itemIds",
@@ -328,6 +491,13 @@ class SprintItemDetailsStream(ZohoSprintsPropsStream):
     parent_stream_type = SprintItemsStream
     primary_keys = ["itemId"]
     replication_key = None
+    concurrent_contexts = True
+    synthesize_setting = "synthesize_item_details"
+    deduplicate_by = "itemId"
+    page_size = None
+    # Full table, so one state entry for the stream rather than a partition
+    # per item
+    state_partitioning_keys: List[str] = []
     schema_filepath = SCHEMAS_DIR / "item.json"
 
     # TODO this is duplicated for ProjectDetails as well
@@ -352,6 +522,8 @@ class SprintItemDetailsStream(ZohoSprintsPropsStream):
             ids_key="itemIds",
             jobj_key="itemJObj",
             primary_key_name="itemId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
 
@@ -363,6 +535,8 @@ class SprintUsers(ZohoSprintsPropsStream):
     parent_stream_type = SprintsStream
     primary_keys = ["userId"]
     replication_key = None
+    # Full table, no partition per sprint needed
+    state_partitioning_keys: List[str] = []
     schema_filepath = SCHEMAS_DIR / "sprint_user.json"
 
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
@@ -374,6 +548,8 @@ class SprintUsers(ZohoSprintsPropsStream):
             ids_key="userIds",
             jobj_key="userJObj",
             primary_key_name="userId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
 
     def get_url_params(
@@ -391,6 +567,9 @@ class ProjectUsers(ZohoSprintsPropsStream):
     parent_stream_type = ProjectsStream
     primary_keys = ["userId"]
     replication_key = None
+    cache_ttl = 60 * 60
+    # Full table, no partition per project needed
+    state_partitioning_keys: List[str] = []
     schema_filepath = SCHEMAS_DIR / "project_user.json"
 
     def parse_response(self, response: requests.Response) -> Iterable[dict]:
@@ -402,4 +581,6 @@ class ProjectUsers(ZohoSprintsPropsStream):
             ids_key="userIds",
             jobj_key="userJObj",
             primary_key_name="userId",
+            mappers=self.record_mappers,
+            projection=self.projection,
         )
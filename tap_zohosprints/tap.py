@@ -1,9 +1,25 @@
 """ZohoSprints tap class."""
-from typing import List
+import copy
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional
 
+import requests
+import singer
+from singer import StateMessage
 from singer_sdk import Tap, Stream
 from singer_sdk import typing as th  # JSON schema typing helpers
-import time
+import threading
+from datetime import datetime, timezone
+
+from tap_zohosprints.async_engine import AsyncRequestEngine
+from tap_zohosprints.cache import ResponseCache, credentials_namespace
+from tap_zohosprints.dedup import SeenIndex
+from tap_zohosprints.metrics import RunMetrics
+from tap_zohosprints.partition import sync_partitioned
+from tap_zohosprints.rate_limit import CircuitBreaker, RateLimiter
+from tap_zohosprints.session import build_session
+from tap_zohosprints.sprint_index import CompletedSprintIndex
 
 # TODO: Import your custom stream types here:
 from tap_zohosprints.streams import (
@@ -57,13 +73,298 @@ class TapZohoSprints(Tap):
         th.Property("client_secret", th.StringType, required=True),
         th.Property("refresh_token", th.StringType, required=True),
         th.Property("start_date", th.DateTimeType),
+        # Number of item detail requests to run at once, defaults to 1
+        th.Property("detail_concurrency", th.IntegerType),
+        # API budget, Zoho allows 30 requests per 60 seconds
+        th.Property("rate_limit_requests", th.IntegerType),
+        th.Property("rate_limit_period_seconds", th.NumberType),
+        # Requests that may be sent back to back before spacing kicks in
+        th.Property("rate_limit_burst", th.IntegerType),
+        # Record properties holding the last modified time of items, epics and
+        # sprints, overrides the defaults on each stream
+        th.Property("modified_time_properties", th.ArrayType(th.StringType)),
+        # Build item details records from the item list when the list already
+        # has every selected property, instead of one request per item
+        th.Property("synthesize_item_details", th.BooleanType),
+        # Build project records from the project list when it already has
+        # every selected property, instead of one details request per project
+        th.Property("synthesize_project_details", th.BooleanType),
+        # Items remembered for de-duplicating sprint and backlog item details
+        th.Property("seen_items_max", th.IntegerType),
+        # Shared HTTP connection pool, defaults to max(10, detail_concurrency)
+        th.Property("http_pool_size", th.IntegerType),
+        # Retries for connection level failures, defaults to 3
+        th.Property("http_max_retries", th.IntegerType),
+        # Seconds to wait on a response, defaults to 300
+        th.Property("http_timeout_seconds", th.NumberType),
+        # SQLite file to cache team, project, tag and user responses in
+        th.Property("response_cache_path", th.StringType),
+        # Size the response cache is trimmed back to, defaults to 256
+        th.Property("response_cache_max_mb", th.IntegerType),
+        # Seconds responses stay fresh by stream name, eg {"team": 86400}
+        th.Property("response_cache_ttls", th.ObjectType()),
+        # Worker processes to split the projects across, defaults to 1
+        th.Property("project_workers", th.IntegerType),
+        # Sync each portal in a worker process of its own when there are
+        # several, defaults to false
+        th.Property("portal_workers", th.BooleanType),
+        # Only sync these projects, defaults to every project
+        th.Property("project_ids", th.ArrayType(th.StringType)),
+        # Only sync these portals (zsoid), defaults to every portal
+        th.Property("portal_ids", th.ArrayType(th.StringType)),
+        # Seconds to pause every request after being locked out of the API,
+        # doubled each time the probe after it is locked out too. Default 60
+        th.Property("lockout_cooldown_seconds", th.NumberType),
+        # Seconds to keep probing a lockout before failing, defaults to 3600
+        th.Property("lockout_max_seconds", th.NumberType),
+        # Records asked for per page by stream, eg {"item_sprint": 200}. Tuned
+        # from there as the run goes, defaults to 100
+        th.Property("page_sizes", th.ObjectType()),
+        # Largest page size to ask for, defaults to 1000
+        th.Property("max_page_size", th.IntegerType),
+        # Grow page sizes while pages stay under page_max_seconds and
+        # page_max_mb, defaults to true
+        th.Property("page_size_tuning", th.BooleanType),
+        th.Property("page_max_seconds", th.NumberType),
+        th.Property("page_max_mb", th.NumberType),
+        # Parse item list pages as they stream in instead of decoding them
+        # whole, needs the streaming extra. Defaults to false
+        th.Property("stream_json_pages", th.BooleanType),
+        # Request each page while the records of the one before are emitted,
+        # defaults to false
+        th.Property("prefetch_next_page", th.BooleanType),
+        # Leave properties the catalog doesn't select out of the unfurled
+        # records instead of building them, defaults to true
+        th.Property("project_selected_properties", th.BooleanType),
+        # SQLite file remembering the completed and canceled sprints whose
+        # items and users are synced, later runs skip them. Off when unset
+        th.Property("completed_sprints_path", th.StringType),
+        # Days before a remembered sprint is walked again anyway, defaults
+        # to 30
+        th.Property("completed_sprints_reverify_days", th.NumberType),
+        # Walk every remembered sprint again this run, refreshing the index
+        th.Property("reverify_completed_sprints", th.BooleanType),
+        # Files the request metrics of each endpoint are written to once the
+        # sync is done, a JSON summary and a Prometheus textfile
+        th.Property("metrics_json_path", th.StringType),
+        th.Property("metrics_prometheus_path", th.StringType),
+        # Crawl each project's subtree with concurrent httpx requests from
+        # one event loop before syncing it, needs the async extra. Defaults
+        # to false
+        th.Property("async_engine", th.BooleanType),
+        # Requests the async engine has in flight at once, defaults to 10
+        th.Property("async_concurrency", th.IntegerType),
+        # Responses the async engine holds for the sync before it stops
+        # crawling ahead, defaults to 500
+        th.Property("async_max_buffered_responses", th.IntegerType),
+        # Threads the epics, sprints, backlog and users of a project are
+        # synced on at once, defaults to 1
+        th.Property("sibling_concurrency", th.IntegerType),
+        # Messages a sibling stream buffers while the ones before it are
+        # still syncing before it waits for them, defaults to 10000
+        th.Property("sibling_max_buffered_messages", th.IntegerType),
     ).to_dict()
 
     def __init__(self, *args, **kwargs):
 
         super().__init__(*args, **kwargs)
-        self.api_limit_last_checkpoint = time.time()
-        self.api_limit_number_of_calls_since_last_checkpoint = 0
+        self.sync_started_at = datetime.now(timezone.utc)
+        self.rate_limiter = RateLimiter(
+            requests_per_period=self.config.get("rate_limit_requests", 30),
+            period=self.config.get("rate_limit_period_seconds", 60),
+            burst=self.config.get("rate_limit_burst", 5),
+        )
+        self.circuit_breaker = CircuitBreaker(
+            cooldown=self.config.get("lockout_cooldown_seconds", 60),
+            max_open_seconds=self.config.get("lockout_max_seconds", 3600),
+        )
+        self.request_lock = threading.Lock()
+        # Items synced this run, shared by item_details_sprint and _backlog
+        self.seen_items = SeenIndex(self.config.get("seen_items_max", 1_000_000))
+        # STATE messages written this run and the seconds spent writing them
+        self.state_stats: Counter = Counter()
+        # Latency, payload and throttling by stream and endpoint
+        self.metrics = RunMetrics()
+        self._requests_session: Optional[requests.Session] = None
+        self.response_cache: Optional[ResponseCache] = None
+        if self.config.get("response_cache_path"):
+            self.response_cache = ResponseCache(
+                self.config["response_cache_path"],
+                max_bytes=self.config.get("response_cache_max_mb", 256) * 1024 * 1024,
+                namespace=credentials_namespace(
+                    self.config["client_id"], self.config["refresh_token"]
+                ),
+            )
+        self.async_engine: Optional[AsyncRequestEngine] = None
+        if self.config.get("async_engine"):
+            if AsyncRequestEngine.available():
+                self.async_engine = AsyncRequestEngine(
+                    self,
+                    concurrency=self.config.get("async_concurrency", 10),
+                    timeout=self.config.get("http_timeout_seconds", 300),
+                    max_buffered_responses=self.config.get(
+                        "async_max_buffered_responses", 500
+                    ),
+                )
+            else:
+                self.logger.warning(
+                    "async_engine needs httpx (the async extra), "
+                    "sending requests one at a time."
+                )
+        self.completed_sprints: Optional[CompletedSprintIndex] = None
+        if self.config.get("completed_sprints_path"):
+            self.completed_sprints = CompletedSprintIndex(
+                self.config["completed_sprints_path"],
+                max_age=self.config.get("completed_sprints_reverify_days", 30)
+                * 24
+                * 60
+                * 60,
+            )
+
+    @property
+    def requests_session(self) -> requests.Session:
+        """Return the keep-alive session every stream sends requests with."""
+        if self._requests_session is None:
+            self._requests_session = build_session(
+                pool_size=self.config.get(
+                    "http_pool_size", max(10, self.config.get("detail_concurrency", 1))
+                ),
+                max_retries=self.config.get("http_max_retries", 3),
+            )
+        return self._requests_session
+
+    def sync_all(self) -> None:
+        """Sync all streams, then log what each stream spent its time on."""
+        self.compact_state()
+        if not sync_partitioned(self):
+            self.sync_in_process()
+        self.log_run_stats()
+        self.write_metrics()
+
+    def sync_in_process(self) -> None:
+        """Sync all streams in this process, without splitting the work."""
+        try:
+            super().sync_all()
+        finally:
+            if self.async_engine is not None:
+                self.async_engine.close()
+        self.clear_checkpoints()
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Load the bookmarks, and the checkpoints of an interrupted run.
+
+        The SDK only takes the bookmarks from the input state, without the
+        checkpoints a restarted run would walk everything again.
+        """
+        super().load_state(state)
+        if state.get("checkpoints"):
+            self.state["checkpoints"] = copy.deepcopy(state["checkpoints"])
+
+    def clear_checkpoints(self) -> None:
+        """Forget the completed subtrees and pages once the whole sync is done.
+
+        They're only there to resume an interrupted run, the next run has to
+        walk everything again.
+        """
+        if self.state.pop("checkpoints", None) is not None:
+            singer.write_message(StateMessage(value=self.state))
+            self.state_stats["state_messages"] += 1
+
+    def compact_state(self) -> None:
+        """Drop partitions finer than the stream's state_partitioning_keys.
+
+        States written before a stream was partitioned more coarsely still
+        hold a partition per old context, which would otherwise be carried
+        forward by every run. Only full table streams were coarsened, so
+        there are no bookmarks to lose.
+        """
+        for stream in self.streams.values():
+            if stream.state_partitioning_keys is None:
+                continue
+            bookmark = self.state.get("bookmarks", {}).get(stream.name, {})
+            partitions = bookmark.get("partitions") or []
+            kept = [
+                partition
+                for partition in partitions
+                if set(partition["context"]) <= set(stream.state_partitioning_keys)
+            ]
+            if len(kept) < len(partitions):
+                self.logger.info(
+                    f"Dropped {len(partitions) - len(kept)} state partitions of "
+                    f"'{stream.name}' finer than {stream.state_partitioning_keys}."
+                )
+                bookmark["partitions"] = kept
+
+    def log_run_stats(self) -> None:
+        """Log the run_stats counters collected by each stream."""
+        for stream in self.streams.values():
+            run_stats = getattr(stream, "run_stats", None)
+            if run_stats:
+                stats = {
+                    key: round(value, 3) if isinstance(value, float) else value
+                    for key, value in sorted(run_stats.items())
+                }
+                if run_stats.get("requests_sent"):
+                    stats["connection_reuse"] = round(
+                        1 - run_stats["new_connections"] / run_stats["requests_sent"],
+                        3,
+                    )
+                    if run_stats.get("records_received"):
+                        stats["requests_per_record"] = round(
+                            run_stats["requests_sent"] / run_stats["records_received"],
+                            3,
+                        )
+                record_mappers = getattr(stream, "record_mappers", None)
+                if record_mappers is not None and record_mappers.stats:
+                    stats["record_mapper_hits"] = record_mappers.stats["hits"]
+                    stats["record_mapper_misses"] = record_mappers.stats["misses"]
+                page_size = getattr(stream, "current_page_size", None)
+                if page_size is not None:
+                    stats["page_size"] = page_size
+                self.logger.info(f"Run stats for '{stream.name}': {stats}")
+        limiter_stats = {
+            key: round(value, 3)
+            for key, value in self.rate_limiter.current_stats().items()
+        }
+        self.logger.info(f"Rate limiter stats: {limiter_stats}")
+        breaker_stats = {
+            key: round(value, 3)
+            for key, value in self.circuit_breaker.current_stats().items()
+        }
+        self.logger.info(f"Circuit breaker stats: {breaker_stats}")
+        self.logger.info(f"Seen item index stats: {dict(self.seen_items.stats)}")
+        state_stats = {key: round(value, 3) for key, value in self.state_stats.items()}
+        state_stats["state_bytes"] = len(json.dumps(self.state))
+        state_stats["state_partitions"] = sum(
+            len(bookmark.get("partitions", []))
+            for bookmark in self.state.get("bookmarks", {}).values()
+        )
+        self.logger.info(f"State stats: {state_stats}")
+        if self.response_cache is not None:
+            cache_stats = dict(self.response_cache.stats)
+            self.logger.info(f"Response cache stats: {cache_stats}")
+        if self.async_engine is not None:
+            engine_stats = {
+                key: round(value, 3) for key, value in self.async_engine.stats.items()
+            }
+            self.logger.info(f"Async engine stats: {engine_stats}")
+        if self.completed_sprints is not None:
+            self.logger.info(
+                f"Completed sprint index stats: {dict(self.completed_sprints.stats)}"
+            )
+
+    def write_metrics(self) -> None:
+        """Emit the endpoint metrics as METRIC messages, and write them out.
+
+        Called once per run, after the metrics of any worker processes are
+        merged in.
+        """
+        for point in self.metrics.singer_metrics():
+            self.logger.info(f"METRIC: {json.dumps(point)}")
+        self.metrics.write(
+            json_path=self.config.get("metrics_json_path"),
+            prometheus_path=self.config.get("metrics_prometheus_path"),
+        )
 
     def discover_streams(self) -> List[Stream]:
         """Return a list of discovered streams."""
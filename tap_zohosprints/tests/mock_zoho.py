@@ -0,0 +1,402 @@
+"""Synthetic ZohoSprints API for running the tap offline.
+
+Serves a generated teams -> projects -> sprints/backlog -> items tree through
+the `responses` library, shaped like the real endpoints (_prop/Ids/JObj
+pages, index/range pagination, ?action=details), so full tap runs can be
+tested and benchmarked without credentials.
+"""
+
+import io
+import json
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import responses
+
+from tap_zohosprints.tap import TapZohoSprints
+
+API_URL = "https://sprintsapi.zoho.com/zsapi"
+OAUTH_URL = "https://accounts.zoho.com/oauth/v2/token"
+
+MOCK_CONFIG = {
+    "api_url": API_URL,
+    "oauth_url": OAUTH_URL,
+    "client_id": "client_id",
+    "client_secret": "client_secret",
+    "refresh_token": "refresh_token",
+    # Nothing to protect offline, don't sleep
+    "rate_limit_requests": 1_000_000,
+    "rate_limit_period_seconds": 1,
+    "rate_limit_burst": 1_000_000,
+}
+
+ENVELOPE = {
+    "next": False,
+    "userDisplayName": {"114398000000002003": "AutoIDM"},
+    "zsuserIdvsZUID": {"114398000000002003": "7000000000"},
+    "status": "success",
+}
+
+PROJECT_PROPS = ["projName", "projNo", "owner", "createdBy", "createdTime", "status"]
+EPIC_PROPS = ["epicName", "epicNo", "owner", "createdTime", "epicStatus"]
+SPRINT_PROPS = ["sprintName", "sprintNo", "sprintType", "createdTime", "endDate"]
+ITEM_PROPS = [
+    "itemName",
+    "itemNo",
+    "statusId",
+    "projItemTypeId",
+    "projPriorityId",
+    "createdBy",
+    "createdTime",
+    "startDate",
+    "endDate",
+    "points",
+    "depth",
+    "description",
+]
+# Custom fields only come back from ?action=details
+ITEM_DETAIL_PROPS = ITEM_PROPS + ["customField1"]
+USER_PROPS = ["displayName", "emailId", "userType", "userStatus"]
+TAG_PROPS = ["tagName", "colorCode", "createdBy"]
+
+
+class MockZohoSprints:
+    """Generated ZohoSprints tree served through `responses`.
+
+    Every portal gets `projects` projects and `tags` tags. Every project
+    gets `epics` epics, `sprints` sprints with `items_per_sprint` items each,
+    and a backlog with `backlog_items` items.
+    """
+
+    def __init__(
+        self,
+        projects: int = 2,
+        epics: int = 2,
+        sprints: int = 2,
+        items_per_sprint: int = 5,
+        backlog_items: int = 5,
+        users: int = 3,
+        tags: int = 3,
+        portals: int = 1,
+        lockout_after: Optional[int] = None,
+        lockout_requests: Optional[int] = None,
+        lockout_status: int = 400,
+        throttle_every: Optional[int] = None,
+        max_range: Optional[int] = None,
+        completed_sprints: int = 0,
+        latency: float = 0,
+        modified_time: Optional[int] = None,
+        listed_custom_fields: bool = False,
+        shared_backlog_items: int = 0,
+    ):
+        self.projects = projects
+        self.epics = epics
+        self.sprints = sprints
+        self.items_per_sprint = items_per_sprint
+        self.backlog_items = backlog_items
+        self.users = users
+        self.tags = tags
+        self.portal_ids = [str(1000 + number) for number in range(portals)]
+        # Answer the requests past this many with Zoho's lockout error, for
+        # lockout_requests requests or for good
+        self.lockout_after = lockout_after
+        self.lockout_requests = lockout_requests
+        # Zoho has sent lockouts with a 2xx status too
+        self.lockout_status = lockout_status
+        # Answer every nth request with a 429
+        self.throttle_every = throttle_every
+        # Largest range the endpoints honour, bigger ones are cut down to it
+        self.max_range = max_range
+        # The first completed_sprints sprints of every project are completed
+        # (sprintType 3), the rest active (2)
+        self.completed_sprints = completed_sprints
+        # Epoch milliseconds sent as the lastModifiedTime of every epic,
+        # sprint and item, None leaves the property out
+        self.modified_time = modified_time
+        # Send the custom fields with the item lists too, not just with
+        # ?action=details
+        self.listed_custom_fields = listed_custom_fields
+        # The first shared_backlog_items backlog items of every project are
+        # the first items of its first sprint, listed in both
+        self.shared_backlog_items = shared_backlog_items
+        # Seconds every response takes, and the most requests seen in
+        # flight at once
+        self.latency = latency
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        # Requests answered with an error instead, by error
+        self.rejected: Counter = Counter()
+        # Requests served, by endpoint
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    def expected_record_counts(self) -> Dict[str, int]:
+        """Records a full sync of the generated tree should emit."""
+        projects = len(self.portal_ids) * self.projects
+        sprint_items = projects * self.sprints * self.items_per_sprint
+        backlog_items = projects * self.backlog_items
+        return {
+            "team": 1,
+            "meta_project": projects,
+            "project": projects,
+            "tag": len(self.portal_ids) * self.tags,
+            "epic": projects * self.epics,
+            "sprint": projects * self.sprints,
+            "backlog": projects,
+            "item_sprint": sprint_items,
+            "item_details_sprint": sprint_items,
+            "item_backlog": backlog_items,
+            # Details of shared items are synced with the sprint's
+            "item_details_backlog": backlog_items
+            - projects * self.shared_backlog_items,
+            "sprint_user": projects * self.sprints * self.users,
+            "project_user": projects * self.users,
+        }
+
+    def install(self, rsps: responses.RequestsMock) -> None:
+        """Register the API and OAuth endpoints on a RequestsMock."""
+        rsps.add(
+            responses.POST,
+            OAUTH_URL,
+            json={"access_token": "access_token", "expires_in": 3600},
+        )
+        rsps.add_callback(
+            responses.GET,
+            re.compile(re.escape(API_URL) + ".*"),
+            callback=self._callback,
+        )
+
+    def async_transport(self):
+        """Return an httpx transport serving the same API, for the async engine."""
+        import httpx
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status, headers, body = self._callback(
+                SimpleNamespace(url=str(request.url))
+            )
+            return httpx.Response(status, headers=headers, content=body.encode())
+
+        return httpx.MockTransport(handler)
+
+    def _callback(self, request):
+        with self._lock:
+            if self._locked_out():
+                self.rejected["lockout"] += 1
+                body = {"code": 7602.1, "status": "failure"}
+                return (self.lockout_status, {}, json.dumps(body))
+            attempts = self.request_count + sum(self.rejected.values()) + 1
+            if self.throttle_every and attempts % self.throttle_every == 0:
+                self.rejected["throttle"] += 1
+                return (429, {"Retry-After": "0"}, "Too Many Requests")
+        url = urlparse(request.url)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self._route(url.path[len(urlparse(API_URL).path) :], params)
+        if self.latency:
+            with self._lock:
+                self._in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            time.sleep(self.latency)
+            with self._lock:
+                self._in_flight -= 1
+        if body is None:
+            return (404, {}, json.dumps({"status": "failure"}))
+        return (200, {"Content-Type": "application/json"}, json.dumps(body))
+
+    def _locked_out(self) -> bool:
+        if self.lockout_after is None or self.request_count < self.lockout_after:
+            return False
+        return (
+            self.lockout_requests is None
+            or self.rejected["lockout"] < self.lockout_requests
+        )
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def _route(self, path: str, params: Dict[str, str]) -> Optional[dict]:
+        index = int(params.get("index", 1))
+        page_size = int(params.get("range", 100))
+        if self.max_range:
+            page_size = min(page_size, self.max_range)
+        action = params.get("action")
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["teams"]:
+            self._count("teams")
+            return {
+                "portals": [
+                    {"zsoid": portal_id, "orgName": f"AutoIDM {portal_id}"}
+                    for portal_id in self.portal_ids
+                ],
+                "ownerTeamIds": self.portal_ids,
+                "myTeamId": self.portal_ids[0],
+                "defaultPortalId": self.portal_ids[0],
+                "status": "success",
+            }
+        if len(parts) < 3 or parts[0] != "team" or parts[1] not in self.portal_ids:
+            return None
+        # Ids are unique across portals, like Zoho's
+        prefix = "" if parts[1] == self.portal_ids[0] else f"{parts[1]}-"
+        if parts[2] == "tags":
+            self._count("tags")
+            ids = self._ids(f"{prefix}tag", self.tags)
+            return self._page("zsTag", ids, TAG_PROPS, index, page_size)
+        if parts[2:] == ["projects"] and action == "allprojects":
+            self._count("projects")
+            ids = self._ids(f"{prefix}project", self.projects)
+            return self._page("project", ids, PROJECT_PROPS, index, page_size)
+        if len(parts) < 4:
+            return None
+        project_id = parts[3]
+        rest = parts[4:]
+        if not rest and action == "details":
+            self._count("project_details")
+            return self._page("project", [project_id], PROJECT_PROPS, 1, 1)
+        if not rest and action == "getbacklog":
+            self._count("backlog")
+            return {"backlogId": f"{project_id}-backlog", "status": "success"}
+        if rest == ["epic"]:
+            self._count("epics")
+            ids = self._ids(f"{project_id}-epic", self.epics)
+            return self._page(
+                "epic", ids, EPIC_PROPS, index, page_size, self._modified()
+            )
+        if rest == ["users"]:
+            self._count("project_users")
+            ids = self._ids("user", self.users)
+            return self._page("user", ids, USER_PROPS, index, page_size)
+        if rest == ["sprints"]:
+            self._count("sprints")
+            ids = self._ids(f"{project_id}-sprint", self.sprints)
+            body = self._page(
+                "sprint", ids, SPRINT_PROPS, index, page_size, self._modified()
+            )
+            if self.completed_sprints:
+                type_index = SPRINT_PROPS.index("sprintType")
+                for sprint_id, values in body["sprintJObj"].items():
+                    completed = ids.index(sprint_id) < self.completed_sprints
+                    values[type_index] = 3 if completed else 2
+            return body
+
+        if len(rest) < 3 or rest[0] != "sprints":
+            return None
+        sprint_id = rest[1]
+        if rest[2:] == ["users"]:
+            self._count("sprint_users")
+            ids = self._ids("user", self.users)
+            return self._page("user", ids, USER_PROPS, 1, self.users)
+        if rest[2:] == ["item"]:
+            self._count("items")
+            ids = self._ids(f"{sprint_id}-item", self.items_per_sprint)
+            if sprint_id.endswith("-backlog"):
+                shared = self.shared_backlog_items
+                ids = self._ids(f"{project_id}-sprint0-item", shared) + self._ids(
+                    f"{sprint_id}-item", self.backlog_items - shared
+                )
+            props = ITEM_DETAIL_PROPS if self.listed_custom_fields else ITEM_PROPS
+            return self._page("item", ids, props, index, page_size, self._modified())
+        if rest[2] == "item" and action == "details":
+            self._count("item_details")
+            return self._page(
+                "item", [rest[3]], ITEM_DETAIL_PROPS, 1, 1, self._modified()
+            )
+        return None
+
+    def _modified(self) -> dict:
+        if self.modified_time is None:
+            return {}
+        return {"lastModifiedTime": self.modified_time}
+
+    @staticmethod
+    def _ids(prefix: str, count: int) -> List[str]:
+        return [f"{prefix}{number}" for number in range(count)]
+
+    @staticmethod
+    def _page(
+        name: str,
+        ids: List[str],
+        props: List[str],
+        index: int,
+        page_size: int,
+        constants: Optional[dict] = None,
+    ) -> dict:
+        """Return one page, constants are properties with the same value on
+        every record."""
+        constants = constants or {}
+        props = props + list(constants)
+        page_ids = ids[index - 1 : index - 1 + page_size]
+        body = dict(ENVELOPE)
+        body[f"{name}JObj"] = {
+            id: [
+                constants.get(property_name, f"{id}-{property_name}")
+                for property_name in props
+            ]
+            for id in page_ids
+        }
+        body[f"{name}_prop"] = {
+            property_name: property_index
+            for property_index, property_name in enumerate(props)
+        }
+        body[f"{name}Ids"] = page_ids
+        if index - 1 + page_size < len(ids):
+            body["nextIndex"] = index + page_size
+        return body
+
+
+def run_tap(
+    api: MockZohoSprints,
+    config: Optional[dict] = None,
+    state: Optional[dict] = None,
+    output: Optional[io.StringIO] = None,
+    catalog: Optional[dict] = None,
+) -> List[dict]:
+    """Run a full sync against the synthetic API, return the Singer messages.
+
+    Messages are written to output, pass one in to see what a failed run
+    wrote.
+    """
+    output = output or io.StringIO()
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        api.install(rsps)
+        tap = TapZohoSprints(
+            config={**MOCK_CONFIG, **(config or {})}, catalog=catalog, state=state
+        )
+        with redirect_stdout(output):
+            tap.sync_all()
+    return [json.loads(line) for line in output.getvalue().splitlines() if line]
+
+
+def record_counts(messages: List[dict]) -> Dict[str, int]:
+    return dict(
+        Counter(
+            message["stream"] for message in messages if message["type"] == "RECORD"
+        )
+    )
+
+
+def comparable_records(messages: List[dict]) -> List[str]:
+    """Return the RECORD messages as sorted JSON, to compare two runs by.
+
+    time_extracted is when each message was written, and records whose
+    modifiedTime falls back to when the run started differ from run to run,
+    so both are left out.
+    """
+    return sorted(
+        json.dumps(
+            {key: value for key, value in message.items() if key != "time_extracted"},
+            sort_keys=True,
+        )
+        for message in messages
+        if message["type"] == "RECORD" and "modifiedTime" not in message["record"]
+    )
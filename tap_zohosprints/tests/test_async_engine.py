@@ -0,0 +1,128 @@
+"""Tests for the opt in async request engine."""
+
+import ast
+import logging
+import re
+
+import pytest
+
+from tap_zohosprints.async_engine import AsyncRequestEngine
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+pytest.importorskip("httpx")
+
+TREE = dict(projects=3, sprints=3, items_per_sprint=30, backlog_items=120)
+
+
+def async_run(monkeypatch, api, config=None):
+    monkeypatch.setattr(AsyncRequestEngine, "transport", api.async_transport())
+    return run_tap(
+        api, config={"async_engine": True, "async_concurrency": 4, **(config or {})}
+    )
+
+
+def messages(messages):
+    # In the order they were written, modifiedTime falls back to when each
+    # run started
+    return [
+        (
+            message["type"],
+            message.get("stream"),
+            {
+                key: value
+                for key, value in message.get("record", {}).items()
+                if key != "modifiedTime"
+            },
+        )
+        for message in messages
+        if message["type"] != "STATE"
+    ]
+
+
+def test_async_engine_emits_the_same_messages(monkeypatch, caplog):
+    serial_api = MockZohoSprints(**TREE)
+    async_api = MockZohoSprints(**TREE)
+    # Page sizes aren't tuned with the async engine
+    config = {"page_size_tuning": False}
+
+    serial = run_tap(serial_api, config=config)
+    with caplog.at_level(logging.INFO):
+        crawled = async_run(monkeypatch, async_api, config=config)
+
+    assert record_counts(crawled) == async_api.expected_record_counts()
+    assert messages(crawled) == messages(serial)
+    assert async_api.requests == serial_api.requests
+    # Everything below the project list came from the engine
+    assert "'unused': 0" in caplog.text
+    assert "'async_prefetched_responses'" in caplog.text
+
+
+def test_async_engine_skips_what_the_sync_skips(monkeypatch, tmp_path):
+    tree = dict(projects=2, sprints=3, completed_sprints=2)
+    config = {"completed_sprints_path": str(tmp_path / "sprints.db")}
+    run_tap(MockZohoSprints(**tree), config=config)
+
+    api = MockZohoSprints(**tree)
+    async_run(monkeypatch, api, config=config)
+
+    # Only the active sprint of each project is walked
+    assert api.requests["sprint_users"] == 2
+    assert api.requests["items"] == 2 + 2
+
+
+def test_async_engine_requests_no_more_than_the_sync(monkeypatch):
+    config = {"synthesize_project_details": True, "page_size_tuning": False}
+    serial_api = MockZohoSprints(**TREE)
+    async_api = MockZohoSprints(**TREE)
+
+    run_tap(serial_api, config=config)
+    crawled = async_run(monkeypatch, async_api, config=config)
+
+    assert record_counts(crawled) == async_api.expected_record_counts()
+    # Project records built from the project list aren't requested either
+    assert async_api.requests == serial_api.requests
+    assert async_api.requests["project_details"] == 1
+
+
+def run_stats(text):
+    return {
+        match.group(1): ast.literal_eval(match.group(2))
+        for match in re.finditer(r"Run stats for '(\w+)': (\{.*\})", text)
+    }
+
+
+def mapper_lookups(stats):
+    return stats.get("record_mapper_hits", 0) + stats.get("record_mapper_misses", 0)
+
+
+def test_prefetched_pages_are_decoded_once(monkeypatch, caplog):
+    config = {"page_size_tuning": False}
+    with caplog.at_level(logging.INFO):
+        run_tap(MockZohoSprints(**TREE), config=config)
+    serial = run_stats(caplog.text)
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        async_run(monkeypatch, MockZohoSprints(**TREE), config=config)
+    crawled = run_stats(caplog.text)
+
+    for name, stats in serial.items():
+        assert crawled[name].get("decoded_responses") == stats.get("decoded_responses")
+        # The crawl may compile a mapper the sync then finds cached
+        assert mapper_lookups(crawled[name]) == mapper_lookups(stats)
+
+
+def test_async_engine_buffers_a_bounded_number_of_responses(monkeypatch, caplog):
+    serial_api = MockZohoSprints(**TREE)
+    async_api = MockZohoSprints(**TREE)
+    config = {"page_size_tuning": False, "async_max_buffered_responses": 5}
+
+    serial = run_tap(serial_api, config=config)
+    with caplog.at_level(logging.INFO):
+        crawled = async_run(monkeypatch, async_api, config=config)
+
+    assert messages(crawled) == messages(serial)
+    assert async_api.requests == serial_api.requests
+    assert "'buffer_full'" in caplog.text
+    # Requests in flight when the buffer filled up are kept too
+    most_buffered = re.search(r"'most_buffered': (\d+)", caplog.text)
+    assert 5 <= int(most_buffered.group(1)) < 5 + 4
@@ -0,0 +1,103 @@
+"""Offline benchmarks of full tap runs against the synthetic API.
+
+Run with `poetry run pytest tap_zohosprints/tests/test_benchmarks.py`, the
+records/sec, requests issued and peak memory of each run are reported in
+the pytest-benchmark table (extra_info) so regressions show up without
+hitting the real API.
+"""
+
+import time
+import tracemalloc
+from typing import List
+
+import pytest
+
+from tap_zohosprints.tests.mock_zoho import (
+    MockZohoSprints,
+    comparable_records,
+    record_counts,
+    run_tap,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+TREE_SIZES = {
+    "small": dict(projects=2, sprints=2, items_per_sprint=10, backlog_items=10),
+    "large": dict(projects=3, sprints=4, items_per_sprint=25, backlog_items=30),
+}
+
+
+def test_offline_sync_emits_whole_tree():
+    api = MockZohoSprints()
+
+    messages = run_tap(api)
+
+    assert record_counts(messages) == api.expected_record_counts()
+
+
+def test_concurrent_details_emit_the_same_records():
+    serial = run_tap(MockZohoSprints())
+    concurrent = run_tap(MockZohoSprints(), config={"detail_concurrency": 4})
+
+    assert comparable_records(concurrent) == comparable_records(serial)
+
+
+def test_concurrent_details_come_before_their_items_and_final_state():
+    messages = run_tap(MockZohoSprints(), config={"detail_concurrency": 2})
+
+    written = {}
+    finalized = {}
+    for index, message in enumerate(messages):
+        if message["type"] == "RECORD" and "itemId" in message["record"]:
+            written[(message["stream"], message["record"]["itemId"])] = index
+        elif message["type"] == "STATE":
+            bookmark = message["value"]["bookmarks"].get("item_sprint", {})
+            for partition in bookmark.get("partitions", []):
+                # Until then the progress is kept in progress_markers
+                if "replication_key_value" in partition and (
+                    "progress_markers" not in partition
+                ):
+                    finalized.setdefault(partition["context"]["sprintId"], index)
+    details = {
+        item_id: index
+        for (stream, item_id), index in written.items()
+        if stream == "item_details_sprint"
+    }
+
+    assert details
+    for item_id, index in details.items():
+        assert index < written[("item_sprint", item_id)]
+        assert index < finalized[item_id.rsplit("-", 1)[0]]
+
+
+@pytest.mark.parametrize("size", TREE_SIZES)
+@pytest.mark.parametrize("detail_concurrency", [1, 8])
+def test_benchmark_full_sync(benchmark, size, detail_concurrency):
+    config = {"detail_concurrency": detail_concurrency}
+    apis: List[MockZohoSprints] = []
+
+    def setup():
+        apis.append(MockZohoSprints(**TREE_SIZES[size]))
+        return (apis[-1],), {"config": config}
+
+    messages = benchmark.pedantic(run_tap, setup=setup, rounds=3)
+
+    records = sum(record_counts(messages).values())
+    assert record_counts(messages) == apis[-1].expected_record_counts()
+
+    # Peak memory from a separate run, tracemalloc skews the timings
+    tracemalloc.start()
+    start = time.perf_counter()
+    run_tap(MockZohoSprints(**TREE_SIZES[size]), config=config)
+    elapsed = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    benchmark.extra_info["records"] = records
+    benchmark.extra_info["requests"] = apis[-1].request_count
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info["records_per_second"] = round(
+            records / benchmark.stats.stats.min, 1
+        )
+    benchmark.extra_info["peak_memory_mb"] = round(peak_memory / 1024 / 1024, 2)
+    benchmark.extra_info["traced_seconds"] = round(elapsed, 3)
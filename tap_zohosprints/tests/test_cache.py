@@ -0,0 +1,87 @@
+"""Tests for the on disk response cache."""
+
+import logging
+
+import requests
+
+from tap_zohosprints.cache import ResponseCache, credentials_namespace
+from tap_zohosprints.tests.mock_zoho import (
+    MockZohoSprints,
+    comparable_records,
+    record_counts,
+    run_tap,
+)
+
+
+def _response(body: bytes, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.headers.update(headers)
+    return response
+
+
+def test_round_trip_keeps_body_and_validators(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.put("GET https://autoidm.com/teams/", _response(b'{"a": 1}', ETag='"abc"'))
+
+    cached = cache.get("GET https://autoidm.com/teams/")
+    request = requests.Request("GET", "https://autoidm.com/teams/").prepare()
+    response = cached.to_response(request)
+
+    assert response.json() == {"a": 1}
+    assert cached.conditional_headers() == {"If-None-Match": '"abc"'}
+    assert cache.get("GET https://autoidm.com/projects/") is None
+
+
+def test_survives_restarts(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path).put("key", _response(b"{}"))
+
+    assert ResponseCache(path).get("key").body == b"{}"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=10)
+    cache.put("first", _response(b"1234"))
+    cache.put("second", _response(b"1234"))
+    cache.get("first")
+    cache.put("third", _response(b"1234"))
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.stats["evicted"] == 1
+
+
+def test_credentials_keep_their_own_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    request = requests.Request("GET", "https://autoidm.com/teams/").prepare()
+    first = ResponseCache(path, namespace=credentials_namespace("id", "first"))
+    second = ResponseCache(path, namespace=credentials_namespace("id", "second"))
+    first.put(first.key_for(request), _response(b'{"portals": ["first"]}'))
+
+    assert second.get(second.key_for(request)) is None
+    assert first.get(first.key_for(request)).body == b'{"portals": ["first"]}'
+
+
+def test_second_run_reuses_cached_responses(tmp_path, caplog):
+    config = {"response_cache_path": str(tmp_path / "cache.sqlite")}
+    first_api = MockZohoSprints()
+    second_api = MockZohoSprints()
+
+    first_run = run_tap(first_api, config=config)
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        second_run = run_tap(second_api, config=config)
+
+    assert record_counts(second_run) == second_api.expected_record_counts()
+    assert comparable_records(second_run) == comparable_records(first_run)
+    for endpoint in ("teams", "projects", "project_details", "tags", "project_users"):
+        assert first_api.requests[endpoint]
+        assert not second_api.requests[endpoint], endpoint
+    # Sprints and items aren't cached
+    for endpoint in ("sprints", "items", "item_details"):
+        assert second_api.requests[endpoint] == first_api.requests[endpoint]
+    assert "'cache_hits'" in caplog.text
+    assert "'cache_misses'" not in caplog.text
@@ -1,20 +1,35 @@
 """Tests standard tap features using the built-in SDK tests library."""
 
 import datetime
+import json
+import logging
 from pathlib import Path
 import os
+import timeit
 import pytest
 import responses
 import requests
 
 from singer_sdk.testing import get_standard_tap_tests
 from tap_zohosprints.client import (
+    _STREAMED_BODY_ATTRIBUTE,
+    RecordMappers,
     ZohoSprintsPropsStream,
+    Projection,
     ZohoSprintsStream,
+    decode_response,
     property_unfurler,
 )
 
 from tap_zohosprints.tap import TapZohoSprints
+from tap_zohosprints.tests.mock_zoho import (
+    ITEM_PROPS,
+    MOCK_CONFIG,
+    MockZohoSprints,
+    comparable_records,
+    record_counts,
+    run_tap,
+)
 
 SAMPLE_CONFIG = {
     "api_url": os.environ["TAP_ZOHOSPRINTS_API_URL"],
@@ -79,3 +94,231 @@ def test_property_unfurler(mocked_responses):
         },
         "tagId": "114398000000007021",
     }
+
+
+def test_decode_response_decodes_once(mocked_responses):
+    mocked_responses.add(
+        responses.GET,
+        "https://autoidm.com",
+        body=_item_page(3),
+        status=200,
+        content_type="application/json",
+    )
+    resp = requests.get("https://autoidm.com")
+
+    decoded = decode_response(resp)
+    assert decode_response(resp) is decoded
+    unfurled = list(
+        property_unfurler(
+            response=resp,
+            prop_key="item_prop",
+            ids_key="itemIds",
+            jobj_key="itemJObj",
+            primary_key_name="itemId",
+        )
+    )
+    assert [record["itemId"] for record in unfurled] == decoded["itemIds"]
+
+
+def test_unfurled_records_share_only_nested_envelope_values(mocked_responses):
+    mocked_responses.add(
+        responses.GET,
+        "https://autoidm.com",
+        body=_item_page(2),
+        status=200,
+        content_type="application/json",
+    )
+    first, second = property_unfurler(
+        response=requests.get("https://autoidm.com"),
+        prop_key="item_prop",
+        ids_key="itemIds",
+        jobj_key="itemJObj",
+        primary_key_name="itemId",
+    )
+
+    first["status"] = "edited"
+    assert second["status"] == "success"
+    # Read-only, copying them per record is quadratic in the page size
+    assert first["userDisplayName"] is second["userDisplayName"]
+
+
+def _item_page(number_of_items: int) -> str:
+    """Build an item list page shaped like the sprintitems endpoint."""
+    props = {f"property{index}": index for index in range(20)}
+    ids = [str(114398000000007021 + item) for item in range(number_of_items)]
+    # Zoho lists every user mentioned on the page, one per item here
+    users = [str(114398000000002003 + item) for item in range(number_of_items)]
+    return json.dumps(
+        {
+            "next": False,
+            "userDisplayName": {user: f"User {user}" for user in users},
+            "zsuserIdvsZUID": {user: f"7{user}" for user in users},
+            "status": "success",
+            "item_prop": props,
+            "itemIds": ids,
+            "itemJObj": {
+                id: [f"{id}-{index}" for index in props.values()] for id in ids
+            },
+        }
+    )
+
+
+def test_property_unfurler_scales_linearly(mocked_responses):
+    """Unfurling a page should cost O(page), not O(page^2)."""
+    timings = {}
+    for number_of_items in (100, 400):
+        mocked_responses.add(
+            responses.GET,
+            f"https://autoidm.com/{number_of_items}",
+            body=_item_page(number_of_items),
+            status=200,
+            content_type="application/json",
+        )
+        resp = requests.get(f"https://autoidm.com/{number_of_items}")
+
+        def unfurl():
+            for _ in property_unfurler(
+                response=resp,
+                prop_key="item_prop",
+                ids_key="itemIds",
+                jobj_key="itemJObj",
+                primary_key_name="itemId",
+            ):
+                pass
+
+        timings[number_of_items] = min(timeit.repeat(unfurl, number=3, repeat=3))
+
+    # 4x the records should take roughly 4x the time, a quadratic unfurler
+    # would take ~16x
+    assert timings[400] / timings[100] < 8
+
+
+def test_streamed_pages_unfurl_like_decoded_ones(mocked_responses):
+    pytest.importorskip("ijson")
+    mocked_responses.add(
+        responses.GET,
+        "https://autoidm.com",
+        body=_item_page(3),
+        status=200,
+        content_type="application/json",
+    )
+    stream = TapZohoSprints(config=MOCK_CONFIG).streams["item_sprint"]
+    expected = list(
+        property_unfurler(
+            response=requests.get("https://autoidm.com"),
+            prop_key="item_prop",
+            ids_key="itemIds",
+            jobj_key="itemJObj",
+            primary_key_name="itemId",
+        )
+    )
+
+    # The first page is held back until its layout is known, the second
+    # streams record by record
+    for page in range(2):
+        resp = requests.get("https://autoidm.com", stream=True)
+        setattr(resp, _STREAMED_BODY_ATTRIBUTE, True)
+        unfurled = list(
+            stream.unfurl(
+                response=resp,
+                prop_key="item_prop",
+                ids_key="itemIds",
+                jobj_key="itemJObj",
+                primary_key_name="itemId",
+            )
+        )
+        assert unfurled == expected
+        assert stream.get_next_page_token(resp, None) is None
+    assert stream.run_stats["held_back_records"] == 3
+    assert stream.run_stats["streamed_records"] == 3
+
+
+def test_streamed_sync_emits_the_same_records(caplog):
+    pytest.importorskip("ijson")
+    api = MockZohoSprints(items_per_sprint=120)
+
+    with caplog.at_level(logging.INFO):
+        streamed = run_tap(api, config={"stream_json_pages": True})
+    decoded = run_tap(MockZohoSprints(items_per_sprint=120))
+
+    assert record_counts(streamed) == api.expected_record_counts()
+    assert "'streamed_pages'" in caplog.text
+    assert comparable_records(streamed) == comparable_records(decoded)
+
+
+def test_record_mappers_compile_each_prop_once(mocked_responses):
+    mappers = RecordMappers()
+    for page in range(3):
+        mocked_responses.add(
+            responses.GET,
+            f"https://autoidm.com/{page}",
+            body=_item_page(4),
+            status=200,
+            content_type="application/json",
+        )
+        resp = requests.get(f"https://autoidm.com/{page}")
+        unfurled = list(
+            property_unfurler(
+                response=resp,
+                prop_key="item_prop",
+                ids_key="itemIds",
+                jobj_key="itemJObj",
+                primary_key_name="itemId",
+                mappers=mappers,
+            )
+        )
+        assert unfurled[0]["record"] == {
+            f"property{index}": f"{unfurled[0]['itemId']}-{index}"
+            for index in range(20)
+        }
+
+    assert mappers.stats == {"misses": 1, "hits": 2}
+    assert mappers.get({"one": 0})(["value"]) == {"one": "value"}
+    assert mappers.get({})(["value"]) == {}
+
+
+def test_unselected_properties_are_never_built():
+    def metadata(breadcrumb, selected):
+        return {"breadcrumb": breadcrumb, "metadata": {"selected": selected}}
+
+    unselected = [
+        metadata(["properties", "userDisplayName"], False),
+        metadata(["properties", "zsuserIdvsZUID"], False),
+        metadata(["properties", "record", "properties", "startDate"], False),
+    ]
+    tap = TapZohoSprints(config=MOCK_CONFIG)
+    catalog = {
+        "streams": [
+            {
+                "tap_stream_id": stream.name,
+                "stream": stream.name,
+                "schema": stream.schema,
+                "metadata": [metadata([], True)]
+                + (unselected if stream.name == "item_sprint" else []),
+            }
+            for stream in tap.streams.values()
+        ]
+    }
+    tap = TapZohoSprints(config=MOCK_CONFIG, catalog=catalog)
+    item_sprint = tap.streams["item_sprint"]
+    item_backlog = tap.streams["item_backlog"]
+    body = MockZohoSprints._page("item", ["item0", "item1"], ITEM_PROPS, 1, 100)
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode()
+
+    assert item_sprint.projection == Projection(
+        record_properties=frozenset({"startDate"}),
+        keys=frozenset({"userDisplayName", "zsuserIdvsZUID"}),
+    )
+    assert item_backlog.projection is None
+    records = list(item_sprint.parse_response(response))
+    assert [record["itemId"] for record in records] == ["item0", "item1"]
+    for record in records:
+        assert not {"userDisplayName", "zsuserIdvsZUID"} & set(record)
+        assert "startDate" not in record["record"]
+        # Custom fields aren't in the schema, so can't be unselected
+        assert "itemName" in record["record"]
+    backlog_record = next(iter(item_backlog.parse_response(response)))
+    assert "userDisplayName" in backlog_record
+    assert "startDate" in backlog_record["record"]
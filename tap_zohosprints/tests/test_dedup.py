@@ -0,0 +1,65 @@
+"""Tests for the run scoped seen index."""
+
+from collections import Counter
+
+import pytest
+
+from tap_zohosprints.dedup import SeenIndex
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+
+def test_seen_index_reports_duplicates():
+    seen = SeenIndex()
+
+    assert seen.add(("114398000000007021", "2021-10-19T03:36:29+00:00"))
+    assert not seen.add(("114398000000007021", "2021-10-19T03:36:29+00:00"))
+    # Same item modified since, sync it again
+    assert seen.add(("114398000000007021", "2021-10-20T03:36:29+00:00"))
+    assert seen.stats == {"added": 2, "duplicates": 1}
+
+
+def test_seen_index_evicts_least_recently_seen():
+    seen = SeenIndex(max_size=2)
+    seen.add("a")
+    seen.add("b")
+    seen.add("a")
+    seen.add("c")
+
+    assert len(seen) == 2
+    assert seen.stats["evicted"] == 1
+    assert not seen.add("a")
+    assert seen.add("b")
+
+
+@pytest.mark.parametrize("sibling_concurrency", [1, 4])
+def test_items_in_a_sprint_and_the_backlog_get_one_details_record(
+    sibling_concurrency,
+):
+    api = MockZohoSprints(shared_backlog_items=2, latency=0.001)
+
+    messages = run_tap(api, config={"sibling_concurrency": sibling_concurrency})
+
+    counts = record_counts(messages)
+    expected = api.expected_record_counts()
+    if sibling_concurrency == 1:
+        assert counts == expected
+    # Concurrent siblings sync a shared item under whichever lists it first
+    assert counts["item_details_sprint"] + counts["item_details_backlog"] == (
+        expected["item_details_sprint"] + expected["item_details_backlog"]
+    )
+    details = Counter(
+        message["record"]["itemId"]
+        for message in messages
+        if message["type"] == "RECORD"
+        and message["stream"] in ("item_details_sprint", "item_details_backlog")
+    )
+    assert details["project0-sprint0-item0"] == 1
+    assert set(details.values()) == {1}
+    # Both lists still have the shared items
+    backlog_items = {
+        message["record"]["itemId"]
+        for message in messages
+        if message["type"] == "RECORD" and message["stream"] == "item_backlog"
+    }
+    assert "project0-sprint0-item0" in backlog_items
+    assert api.requests["item_details"] == sum(details.values())
@@ -0,0 +1,59 @@
+"""Tests for skipping epics, sprints and items that haven't changed."""
+
+import logging
+
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+MODIFIED_TIME = 1_600_000_000_000
+
+
+def final_state(messages):
+    return [message for message in messages if message["type"] == "STATE"][-1]["value"]
+
+
+def test_second_run_skips_unchanged_records(caplog):
+    api = MockZohoSprints(modified_time=MODIFIED_TIME)
+    first_run = run_tap(api)
+    assert record_counts(first_run) == api.expected_record_counts()
+
+    api = MockZohoSprints(modified_time=MODIFIED_TIME)
+    with caplog.at_level(logging.INFO):
+        second_run = run_tap(api, state=final_state(first_run))
+
+    counts = record_counts(second_run)
+    for stream_name in (
+        "epic",
+        "sprint",
+        "item_sprint",
+        "item_backlog",
+        "item_details_sprint",
+        "item_details_backlog",
+    ):
+        assert stream_name not in counts
+    assert api.requests["item_details"] == 0
+    # Sprints aren't pruned, their items are still listed
+    assert api.requests["items"] == api.projects * (api.sprints + 1)
+    assert "'unchanged_records_skipped'" in caplog.text
+    assert "modified_time_properties" not in caplog.text
+
+    # A change after the bookmark is synced again
+    api = MockZohoSprints(modified_time=MODIFIED_TIME + 1000)
+    third_run = run_tap(api, state=final_state(second_run))
+    assert record_counts(third_run) == api.expected_record_counts()
+
+
+def test_missing_modified_time_is_logged_once(caplog):
+    api = MockZohoSprints()
+    with caplog.at_level(logging.WARNING):
+        first_run = run_tap(api)
+        second_run = run_tap(MockZohoSprints(), state=final_state(first_run))
+
+    # Without the properties every record counts as changed
+    assert record_counts(second_run) == api.expected_record_counts()
+    for stream_name in ("epic", "sprint", "item_sprint", "item_backlog"):
+        warnings = [
+            record.getMessage()
+            for record in caplog.records
+            if f"in '{stream_name}' records" in record.getMessage()
+        ]
+        assert len(warnings) == 2, stream_name
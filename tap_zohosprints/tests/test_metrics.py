@@ -0,0 +1,80 @@
+"""Tests for the per endpoint request metrics."""
+
+import json
+import logging
+
+from tap_zohosprints.metrics import Histogram
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, run_tap
+
+ITEM_LIST = (
+    "/team/{myTeamId}/projects/{projectId}/sprints/{sprintId}/item/"
+    "?action=sprintitems&subitem=true"
+)
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((1, 10, 100))
+    for value in [0.5] * 90 + [5] * 9 + [500]:
+        histogram.observe(value)
+
+    assert histogram.summary() == {
+        "count": 100,
+        "sum": 590.0,
+        "p50": 1,
+        "p95": 10,
+        "p99": 10,
+        "max": 500,
+    }
+
+
+def test_endpoint_metrics_are_written(tmp_path, caplog):
+    json_path = tmp_path / "metrics.json"
+    prometheus_path = tmp_path / "metrics.prom"
+    api = MockZohoSprints(projects=2, sprints=2, items_per_sprint=30)
+    config = {
+        "metrics_json_path": str(json_path),
+        "metrics_prometheus_path": str(prometheus_path),
+        "page_sizes": {"item_sprint": 10},
+        "page_size_tuning": False,
+    }
+
+    with caplog.at_level(logging.INFO):
+        run_tap(api, config=config)
+
+    summary = {
+        (entry["stream"], entry["endpoint"]): entry
+        for entry in json.loads(json_path.read_text())
+    }
+    item_list = summary[("item_sprint", ITEM_LIST)]
+    assert item_list["requests"] == api.requests["items"] - 2 == 12
+    assert item_list["records"] == 2 * 2 * 30
+    assert item_list["records_per_request"] == 10
+    assert item_list["request_seconds"]["count"] == 12
+    assert item_list["page_records"]["p50"] == 10
+    assert item_list["response_bytes"]["count"] == 12
+    assert sum(entry.get("requests", 0) for entry in summary.values()) == (
+        api.request_count
+    )
+
+    prometheus_text = prometheus_path.read_text()
+    labels = f'stream="item_sprint",endpoint="{ITEM_LIST}"'
+    assert f"tap_zohosprints_requests_total{{{labels}}} 12" in prometheus_text
+    assert f'tap_zohosprints_page_records_bucket{{{labels},le="+Inf"}} 12' in (
+        prometheus_text
+    )
+    assert 'METRIC: {"type": "histogram", "metric": "request_seconds"' in caplog.text
+
+
+def test_worker_metrics_are_merged(tmp_path):
+    json_path = tmp_path / "metrics.json"
+    api = MockZohoSprints(portals=2)
+
+    run_tap(api, config={"metrics_json_path": str(json_path)})
+
+    records = {
+        entry["stream"]: entry.get("records", 0)
+        for entry in json.loads(json_path.read_text())
+    }
+    expected = api.expected_record_counts()
+    assert records["item_sprint"] == expected["item_sprint"]
+    assert records["sprint_user"] == expected["sprint_user"]
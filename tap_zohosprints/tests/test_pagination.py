@@ -0,0 +1,73 @@
+"""Tests for page size tuning of index/range pagination."""
+
+import logging
+
+import pytest
+from singer_sdk.exceptions import FatalAPIError
+
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+
+def test_page_size_grows_to_cut_requests():
+    def sync(config):
+        api = MockZohoSprints(projects=1, sprints=3, items_per_sprint=250)
+        messages = run_tap(api, config={"page_sizes": {"item_sprint": 50}, **config})
+        assert record_counts(messages) == api.expected_record_counts()
+        return api.requests["items"]
+
+    # Plus one backlog page each time. 5 pages per sprint at 50 a page, or
+    # 50 + 100 + 200, then 200 + 400, then 400 once tuned
+    assert sync({"page_size_tuning": False}) == 3 * 5 + 1
+    assert sync({}) == 3 + 2 + 1 + 1
+
+
+def test_page_size_stops_at_the_endpoints_cap(caplog):
+    api = MockZohoSprints(projects=1, sprints=2, items_per_sprint=250, max_range=120)
+
+    with caplog.at_level(logging.INFO):
+        messages = run_tap(api)
+
+    assert record_counts(messages) == api.expected_record_counts()
+    # 100, 200 cut to 120, then the last 30 for the first sprint, 120 a page
+    # after that, plus the backlog page
+    assert api.requests["items"] == 3 + 3 + 1
+    assert "'page_size': 120" in caplog.text
+    assert "'requests_per_record'" in caplog.text
+
+
+def test_prefetching_pages_emits_the_same_messages():
+    tree = dict(projects=2, sprints=2, items_per_sprint=250, backlog_items=120)
+    serial_api = MockZohoSprints(**tree)
+    prefetched_api = MockZohoSprints(**tree)
+
+    serial = run_tap(serial_api)
+    prefetched = run_tap(prefetched_api, config={"prefetch_next_page": True})
+
+    def messages(messages):
+        # In the order they were written, modifiedTime falls back to when
+        # each run started
+        return [
+            (
+                message["stream"],
+                {
+                    key: value
+                    for key, value in message["record"].items()
+                    if key != "modifiedTime"
+                },
+            )
+            for message in messages
+            if message["type"] == "RECORD"
+        ]
+
+    assert messages(prefetched) == messages(serial)
+    assert prefetched_api.requests == serial_api.requests
+
+
+def test_prefetching_stops_cleanly_on_errors():
+    api = MockZohoSprints(items_per_sprint=250, lockout_after=20)
+
+    with pytest.raises(FatalAPIError):
+        run_tap(api, config={"prefetch_next_page": True, "lockout_max_seconds": 0})
+
+    # Nothing more is requested after the lockout surfaced
+    assert api.rejected["lockout"] == 1
@@ -0,0 +1,108 @@
+"""Tests for syncing projects across worker processes."""
+
+import json
+import logging
+from collections import Counter
+
+from tap_zohosprints.partition import PartitionOutput
+from tap_zohosprints.tests.mock_zoho import (
+    MockZohoSprints,
+    comparable_records,
+    record_counts,
+    run_tap,
+)
+
+
+def test_merge_state_keeps_each_workers_partitions():
+    def partition(project_id, value):
+        return {"context": {"projectId": project_id}, "replication_key_value": value}
+
+    input_state = {"bookmarks": {"epic": {"partitions": [partition("1", "old")]}}}
+    output = PartitionOutput(input_state)
+
+    # Each worker reports its own project, plus a stale copy of the other one
+    output.merge_state({"bookmarks": {"epic": {"partitions": [partition("1", "new")]}}})
+    output.merge_state(
+        {
+            "bookmarks": {
+                "epic": {"partitions": [partition("1", "old"), partition("2", "new")]}
+            }
+        }
+    )
+
+    assert output.state["bookmarks"]["epic"]["partitions"] == [
+        partition("1", "new"),
+        partition("2", "new"),
+    ]
+
+
+def test_partitioned_sync_emits_the_same_records():
+    serial = run_tap(MockZohoSprints(projects=3))
+    partitioned = run_tap(MockZohoSprints(projects=3), config={"project_workers": 2})
+
+    assert (
+        record_counts(partitioned)
+        == MockZohoSprints(projects=3).expected_record_counts()
+    )
+    assert comparable_records(partitioned) == comparable_records(serial)
+    schemas = [
+        message["stream"] for message in partitioned if message["type"] == "SCHEMA"
+    ]
+    assert len(schemas) == len(set(schemas))
+
+
+def test_workers_reuse_the_parents_team_and_project_lists(tmp_path):
+    json_path = tmp_path / "metrics.json"
+    api = MockZohoSprints(projects=3)
+
+    messages = run_tap(
+        api, config={"project_workers": 3, "metrics_json_path": str(json_path)}
+    )
+
+    assert record_counts(messages) == api.expected_record_counts()
+    # Requests sent by the parent and every worker
+    requests = Counter()
+    for entry in json.loads(json_path.read_text()):
+        requests[entry["stream"]] += entry.get("requests", 0)
+    assert requests["team"] == 1
+    assert requests["meta_project"] == 1
+    assert requests["tag"] == 1
+    assert requests["project"] == 3
+
+
+def test_every_portal_is_synced_in_process_by_default(caplog):
+    api = MockZohoSprints(portals=2)
+
+    with caplog.at_level(logging.INFO):
+        messages = run_tap(api)
+
+    assert record_counts(messages) == api.expected_record_counts()
+    assert "worker processes" not in caplog.text
+    assert api.requests["teams"] == 1
+
+
+def test_every_portal_is_synced_in_its_own_worker(caplog):
+    api = MockZohoSprints(portals=2)
+
+    with caplog.at_level(logging.INFO):
+        messages = run_tap(api, config={"portal_workers": True})
+
+    assert record_counts(messages) == api.expected_record_counts()
+    assert "Syncing in 2 worker processes" in caplog.text
+    portals = {
+        message["record"]["myTeamId"]
+        for message in messages
+        if message["type"] == "RECORD" and message["stream"] == "project"
+    }
+    assert portals == {"1000", "1001"}
+
+
+def test_portal_ids_limits_the_portals_synced():
+    messages = run_tap(MockZohoSprints(portals=2), config={"portal_ids": ["1001"]})
+
+    assert record_counts(messages) == MockZohoSprints().expected_record_counts()
+    assert {
+        message["record"]["myTeamId"]
+        for message in messages
+        if message["type"] == "RECORD" and message["stream"] != "team"
+    } == {"1001"}
@@ -0,0 +1,165 @@
+"""Tests for the client side API rate limiter."""
+
+from tap_zohosprints.rate_limit import CircuitBreaker, RateLimiter
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_never_exceeds_budget_in_any_window():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=10, clock=clock, sleep=clock.sleep
+    )
+    sent = []
+    for _ in range(200):
+        limiter.acquire()
+        sent.append(clock.now)
+
+    for index in range(len(sent) - 30):
+        assert sent[index + 30] - sent[index] >= 60
+
+
+def test_burst_then_spaced_out():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=5, clock=clock, sleep=clock.sleep
+    )
+    waits = [limiter.acquire() for _ in range(7)]
+
+    assert waits[:5] == [0, 0, 0, 0, 0]
+    assert waits[5] == 2
+    assert waits[6] == 2
+    assert limiter.stats["throttled_seconds"] == 4
+
+
+def test_idle_time_is_counted_when_bucket_is_full():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=1, clock=clock, sleep=clock.sleep
+    )
+    limiter.acquire()
+    clock.now += 12  # Bucket is full again after 2 seconds
+    limiter.acquire()
+
+    assert limiter.stats["idle_seconds"] == 10
+
+
+def test_retry_after_header_pauses_requests():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=5, clock=clock, sleep=clock.sleep
+    )
+    limiter.update_from_headers({"Retry-After": "15"})
+
+    assert limiter.acquire() == 15
+    assert limiter.stats["header_pauses"] == 1
+
+
+def test_stricter_limit_header_lowers_budget():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=30, clock=clock, sleep=clock.sleep
+    )
+    limiter.update_from_headers({"X-RateLimit-Limit": "10"})
+    sent = []
+    for _ in range(11):
+        limiter.acquire()
+        sent.append(clock.now)
+
+    assert sent[10] - sent[0] >= 60
+
+
+def test_throttling_cuts_rate_and_successes_restore_it():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=1, clock=clock, sleep=clock.sleep
+    )
+    limiter.acquire()
+    limiter.throttled()
+
+    assert limiter.acquire() == 4  # Half the rate, twice the spacing
+    assert limiter.stats["lowest_rate_fraction"] == 0.5
+
+    for _ in range(200):
+        limiter.succeeded()
+    assert limiter.rate == limiter.max_rate
+
+
+def test_peak_utilization_is_reported():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_period=30, period=60, burst=15, clock=clock, sleep=clock.sleep
+    )
+    for _ in range(15):
+        limiter.acquire()
+
+    assert limiter.stats["peak_utilization"] == 0.5
+
+
+def test_circuit_breaker_pauses_then_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(cooldown=60, max_open_seconds=1000, clock=clock)
+    assert breaker.wait_time() == 0
+
+    assert breaker.record_lockout()
+    assert breaker.wait_time() == 60
+    clock.now += 60
+    assert breaker.wait_time() == 0  # The probe
+    assert breaker.wait_time() == CircuitBreaker.PROBE_POLL_SECONDS
+
+    # Probe locked out too, wait twice as long
+    assert breaker.record_lockout()
+    assert breaker.wait_time() == 120
+    clock.now += 120
+    assert breaker.wait_time() == 0
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.wait_time() == 0
+    assert breaker.stats["locked_out_seconds"] == 180
+
+
+def test_circuit_breaker_gives_up_eventually():
+    clock = FakeClock()
+    breaker = CircuitBreaker(cooldown=60, max_open_seconds=100, clock=clock)
+    assert breaker.record_lockout()
+    clock.now += 60
+    breaker.wait_time()
+    assert breaker.record_lockout()
+    clock.now += 120
+    breaker.wait_time()
+
+    assert not breaker.record_lockout()
+
+
+def test_sync_rides_out_lockouts_and_throttling():
+    api = MockZohoSprints(lockout_after=20, lockout_requests=3, throttle_every=15)
+
+    messages = run_tap(api, config={"lockout_cooldown_seconds": 0.01})
+
+    assert record_counts(messages) == api.expected_record_counts()
+    assert api.rejected["lockout"] == 3
+    assert api.rejected["throttle"] > 0
+
+
+def test_streamed_pages_are_checked_for_lockouts():
+    api = MockZohoSprints(
+        items_per_sprint=120, lockout_after=5, lockout_requests=2, lockout_status=200
+    )
+
+    messages = run_tap(
+        api, config={"stream_json_pages": True, "lockout_cooldown_seconds": 0.01}
+    )
+
+    assert record_counts(messages) == api.expected_record_counts()
+    assert api.rejected["lockout"] == 2
@@ -0,0 +1,178 @@
+"""Tests for syncing sibling streams concurrently."""
+
+import io
+import logging
+import sys
+import time
+
+import pytest
+
+from tap_zohosprints.scheduler import SiblingTask, run_in_order
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+TREE = dict(projects=2, epics=3, sprints=3, items_per_sprint=5, backlog_items=5)
+
+
+def messages(messages):
+    # In the order they were written, modifiedTime falls back to when each
+    # run started
+    return [
+        (
+            message["type"],
+            message.get("stream"),
+            {
+                key: value
+                for key, value in message.get("record", {}).items()
+                if key != "modifiedTime"
+            },
+        )
+        for message in messages
+        if message["type"] != "STATE"
+    ]
+
+
+def test_siblings_emit_the_same_messages():
+    serial_api = MockZohoSprints(latency=0.002, **TREE)
+    concurrent_api = MockZohoSprints(latency=0.002, **TREE)
+
+    serial = run_tap(serial_api)
+    concurrent = run_tap(concurrent_api, config={"sibling_concurrency": 4})
+
+    assert record_counts(concurrent) == concurrent_api.expected_record_counts()
+    assert messages(concurrent) == messages(serial)
+    assert concurrent_api.requests == serial_api.requests
+    assert serial_api.peak_in_flight == 1
+    assert concurrent_api.peak_in_flight > 1
+    # The last state has every sibling's bookmarks
+    state = [message for message in concurrent if message["type"] == "STATE"][-1]
+    assert {"epic", "sprint", "item_sprint", "item_backlog"} <= set(
+        state["value"]["bookmarks"]
+    )
+
+
+def test_sibling_checkpoints_only_cover_written_records(caplog):
+    # The epics take longer than the backlog, which is done and buffered
+    # when the epics are checkpointed, but not as long as the sprints
+    api = MockZohoSprints(
+        latency=0.005,
+        modified_time=1_600_000_000_000,
+        **{**TREE, "epics": 10, "backlog_items": 2},
+    )
+    config = {
+        "sibling_concurrency": 4,
+        "page_sizes": {"epic": 1},
+        "page_size_tuning": False,
+    }
+
+    with caplog.at_level(logging.INFO):
+        messages = run_tap(api, config=config)
+
+    assert record_counts(messages) == api.expected_record_counts()
+    last_record = max(
+        index
+        for index, message in enumerate(messages)
+        if message["type"] == "RECORD"
+        and message["record"].get("projectId") == "project0"
+    )
+    mid_project_states = 0
+    for index, message in enumerate(messages):
+        if message["type"] != "STATE":
+            continue
+        written = [
+            earlier for earlier in messages[:index] if earlier["type"] == "RECORD"
+        ]
+        bookmarks = message["value"]["bookmarks"]
+        for stream_name, bookmark in bookmarks.items():
+            for partition in bookmark.get("partitions", []):
+                if "replication_key_value" not in partition:
+                    continue
+                assert any(
+                    record["stream"] == stream_name
+                    and partition["context"].items() <= record["record"].items()
+                    for record in written
+                ), (stream_name, partition["context"])
+        if index < last_record and bookmarks.get("epic", {}).get("partitions"):
+            mid_project_states += 1
+    # The epics were checkpointed while the sprints were still syncing
+    assert mid_project_states
+    assert "'sibling_checkpoints'" in caplog.text
+
+
+def test_run_in_order_keeps_output_and_checkpoints(monkeypatch):
+    output = io.StringIO()
+    monkeypatch.setattr("sys.stdout", output)
+
+    def task(name, seconds):
+        def run():
+            time.sleep(seconds)
+            print(f"{name} 1")
+            print(f"{name} 2")
+
+        return SiblingTask(name, run)
+
+    run_in_order(
+        [task("a", 0.02), task("b", 0), task("c", 0.2)],
+        max_workers=3,
+        checkpoint=lambda synced: f"checkpoint {','.join(sorted(synced))}\n",
+    )
+
+    lines = output.getvalue().splitlines()
+    assert [line for line in lines if not line.startswith("checkpoint")] == [
+        "a 1",
+        "a 2",
+        "b 1",
+        "b 2",
+        "c 1",
+        "c 2",
+    ]
+    # Each checkpoint names the tasks written before it, never all of them
+    for index, line in enumerate(lines):
+        if line.startswith("checkpoint"):
+            written = {
+                earlier.split()[0]
+                for earlier in lines[:index]
+                if not earlier.startswith("checkpoint")
+            }
+            assert line == f"checkpoint {','.join(sorted(written))}"
+            assert written != {"a", "b", "c"}
+    assert "checkpoint a,b" in lines
+
+
+def test_run_in_order_caps_the_buffered_writes(monkeypatch):
+    output = io.StringIO()
+    monkeypatch.setattr("sys.stdout", output)
+
+    def first():
+        time.sleep(0.05)
+        sys.stdout.write("a\n")
+
+    def second():
+        for number in range(5):
+            sys.stdout.write(f"b {number}\n")
+
+    stats = run_in_order(
+        [SiblingTask("a", first), SiblingTask("b", second)],
+        max_workers=2,
+        max_buffered=2,
+    )
+
+    assert output.getvalue().splitlines() == ["a"] + [f"b {n}" for n in range(5)]
+    assert stats["most_buffered_writes"] == 2
+    assert stats["buffer_full_waits"] == 1
+
+
+def test_run_in_order_raises_the_first_error():
+    def fail():
+        raise ValueError("sibling failed")
+
+    started = []
+    with pytest.raises(ValueError, match="sibling failed"):
+        run_in_order(
+            [
+                SiblingTask("a", fail),
+                SiblingTask("b", lambda: started.append("b")),
+            ],
+            max_workers=1,
+        )
+    # Not started once a sibling failed
+    assert started == []
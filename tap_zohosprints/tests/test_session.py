@@ -0,0 +1,21 @@
+"""Tests for the pooled session shared by every stream."""
+
+from tap_zohosprints.session import StreamingSession
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, run_tap
+
+
+def test_http_timeout_is_sent_with_every_request(monkeypatch):
+    timeouts = []
+    send = StreamingSession.send
+
+    def recording_send(session, request, **kwargs):
+        timeouts.append(kwargs.get("timeout"))
+        return send(session, request, **kwargs)
+
+    monkeypatch.setattr(StreamingSession, "send", recording_send)
+    api = MockZohoSprints(projects=1)
+
+    run_tap(api, config={"http_timeout_seconds": 12.5})
+
+    assert len(timeouts) == api.request_count
+    assert set(timeouts) == {12.5}
@@ -0,0 +1,106 @@
+"""Tests for skipping completed sprints synced by earlier runs."""
+
+import logging
+
+from tap_zohosprints.sprint_index import CompletedSprintIndex, sprint_fingerprint
+from tap_zohosprints.tap import TapZohoSprints
+from tap_zohosprints.tests import mock_zoho
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+
+def completed_sprints_api() -> MockZohoSprints:
+    return MockZohoSprints(projects=2, sprints=3, completed_sprints=2)
+
+
+def test_completed_sprints_are_skipped_on_later_runs(tmp_path, caplog):
+    config = {"completed_sprints_path": str(tmp_path / "sprints.db")}
+    first_api = completed_sprints_api()
+    messages = run_tap(first_api, config=config)
+    assert record_counts(messages) == first_api.expected_record_counts()
+
+    second_api = completed_sprints_api()
+    with caplog.at_level(logging.INFO):
+        messages = run_tap(second_api, config=config)
+
+    # Only the active sprint and the backlog of each project are walked
+    assert first_api.requests["items"] == 8
+    assert second_api.requests["items"] == 4
+    assert first_api.requests["sprint_users"] == 6
+    assert second_api.requests["sprint_users"] == 2
+    assert record_counts(messages)["sprint_user"] == 2 * 3
+    assert "'completed_sprints_skipped': 4" in caplog.text
+
+
+def test_reverify_walks_completed_sprints_again(tmp_path):
+    config = {"completed_sprints_path": str(tmp_path / "sprints.db")}
+    run_tap(completed_sprints_api(), config=config)
+
+    api = completed_sprints_api()
+    run_tap(api, config={**config, "reverify_completed_sprints": True})
+    assert api.requests["sprint_users"] == 6
+
+    # An expired entry is walked again too
+    api = completed_sprints_api()
+    run_tap(api, config={**config, "completed_sprints_reverify_days": 0})
+    assert api.requests["sprint_users"] == 6
+
+
+def test_changed_completed_sprint_is_walked_again(tmp_path, monkeypatch):
+    config = {"completed_sprints_path": str(tmp_path / "sprints.db")}
+    run_tap(completed_sprints_api(), config=config)
+
+    monkeypatch.setattr(
+        mock_zoho, "SPRINT_PROPS", mock_zoho.SPRINT_PROPS + ["sprintDescription"]
+    )
+    api = completed_sprints_api()
+    run_tap(api, config=config)
+    assert api.requests["sprint_users"] == 6
+
+    # Remembered again with the new fingerprint
+    api = completed_sprints_api()
+    run_tap(api, config=config)
+    assert api.requests["sprint_users"] == 2
+
+
+def test_selecting_a_child_stream_walks_completed_sprints_again(tmp_path):
+    config = {"completed_sprints_path": str(tmp_path / "sprints.db")}
+    tap = TapZohoSprints(config={**mock_zoho.MOCK_CONFIG, **config})
+    catalog = {
+        "streams": [
+            {
+                "tap_stream_id": stream.name,
+                "stream": stream.name,
+                "schema": stream.schema,
+                "metadata": [
+                    {
+                        "breadcrumb": [],
+                        "metadata": {"selected": stream.name != "sprint_user"},
+                    }
+                ],
+            }
+            for stream in tap.streams.values()
+        ]
+    }
+    api = completed_sprints_api()
+    run_tap(api, config=config, catalog=catalog)
+    assert api.requests["sprint_users"] == 0
+
+    # The sprints were synced without their users, which are backfilled
+    api = completed_sprints_api()
+    messages = run_tap(api, config=config)
+    assert api.requests["sprint_users"] == 6
+    assert record_counts(messages)["sprint_user"] == 6 * 3
+
+
+def test_sprints_are_stored_once_the_state_is_written(tmp_path):
+    index = CompletedSprintIndex(str(tmp_path / "sprints.db"))
+    fingerprint = sprint_fingerprint({"sprintType": 3}, ["item_sprint"])
+
+    index.stage("sprint0", fingerprint)
+    assert not index.is_verified("sprint0", fingerprint)
+
+    index.flush()
+    assert index.is_verified("sprint0", fingerprint)
+    assert not index.is_verified(
+        "sprint0", sprint_fingerprint({"sprintType": 3}, ["item_sprint", "sprint_user"])
+    )
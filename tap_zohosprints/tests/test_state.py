@@ -0,0 +1,43 @@
+"""Tests for keeping the Singer state compact."""
+
+import logging
+
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+
+def test_state_has_no_partition_per_item(caplog):
+    # As written before the detail streams stopped partitioning per item
+    item_context = {
+        "myTeamId": "1000",
+        "projectId": "project0",
+        "sprintId": "project0-sprint0",
+        "itemId": "project0-sprint0-item0",
+    }
+    old_state = {
+        "bookmarks": {
+            "item_details_sprint": {"partitions": [{"context": item_context}]}
+        }
+    }
+    api = MockZohoSprints(items_per_sprint=20)
+
+    with caplog.at_level(logging.INFO):
+        messages = run_tap(api, state=old_state)
+
+    assert record_counts(messages) == api.expected_record_counts()
+    state = [message for message in messages if message["type"] == "STATE"][-1]
+    bookmarks = state["value"]["bookmarks"]
+    for stream_name in (
+        "item_details_sprint",
+        "item_details_backlog",
+        "sprint_user",
+        "project_user",
+    ):
+        assert not bookmarks.get(stream_name, {}).get("partitions")
+    # The context still ends up in the records
+    assert all(
+        message["record"]["sprintId"]
+        for message in messages
+        if message["type"] == "RECORD" and message["stream"] == "sprint_user"
+    )
+    assert "Dropped 1 state partitions of 'item_details_sprint'" in caplog.text
+    assert "'state_bytes'" in caplog.text
@@ -0,0 +1,83 @@
+"""Tests for building detail records from their parent's list record."""
+
+import logging
+
+from tap_zohosprints.tests.mock_zoho import MockZohoSprints, record_counts, run_tap
+
+
+def test_project_records_are_built_from_the_project_list(caplog):
+    requested_api = MockZohoSprints(projects=5)
+    synthesized_api = MockZohoSprints(projects=5)
+
+    requested = run_tap(requested_api)
+    with caplog.at_level(logging.INFO):
+        synthesized = run_tap(
+            synthesized_api, config={"synthesize_project_details": True}
+        )
+
+    assert record_counts(synthesized) == synthesized_api.expected_record_counts()
+    # The first project's details show which properties the endpoint returns
+    assert requested_api.requests["project_details"] == 5
+    assert synthesized_api.requests["project_details"] == 1
+    assert "'requests_avoided': 4" in caplog.text
+
+    def project_records(messages):
+        return sorted(
+            (
+                message["record"]
+                for message in messages
+                if message["type"] == "RECORD" and message["stream"] == "project"
+            ),
+            key=lambda record: record["projectId"],
+        )
+
+    assert project_records(synthesized) == project_records(requested)
+
+
+def item_detail_records(messages):
+    return sorted(
+        (
+            message["record"]
+            for message in messages
+            if message["type"] == "RECORD"
+            and message["stream"] in ("item_details_sprint", "item_details_backlog")
+        ),
+        key=lambda record: record["itemId"],
+    )
+
+
+def test_item_details_are_built_from_the_item_list(caplog):
+    requested_api = MockZohoSprints(listed_custom_fields=True)
+    synthesized_api = MockZohoSprints(listed_custom_fields=True)
+
+    requested = run_tap(requested_api)
+    with caplog.at_level(logging.INFO):
+        synthesized = run_tap(synthesized_api, config={"synthesize_item_details": True})
+
+    items = requested_api.requests["item_details"]
+    assert items == len(item_detail_records(requested))
+    # One details request per project, for sprint and for backlog items,
+    # shows which properties the endpoint returns
+    scopes = synthesized_api.projects * 2
+    assert synthesized_api.requests["item_details"] == scopes
+    counts = synthesized_api.expected_record_counts()
+    for stream_name in ("item_details_sprint", "item_details_backlog"):
+        avoided = counts[stream_name] - synthesized_api.projects
+        assert f"'requests_avoided': {avoided}," in caplog.text
+    assert record_counts(synthesized) == counts
+    assert item_detail_records(synthesized) == item_detail_records(requested)
+
+
+def test_item_details_missing_from_the_item_list_are_requested():
+    requested_api = MockZohoSprints()
+    synthesized_api = MockZohoSprints()
+
+    requested = run_tap(requested_api)
+    synthesized = run_tap(synthesized_api, config={"synthesize_item_details": True})
+
+    # The list has no custom fields, so every item needs its details
+    assert (
+        synthesized_api.requests["item_details"]
+        == requested_api.requests["item_details"]
+    )
+    assert item_detail_records(synthesized) == item_detail_records(requested)